@@ -1,28 +1,367 @@
 """Database connection and initialization module."""
+import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
-from flask import current_app
+from pathlib import Path
+from flask import current_app, g, has_request_context, request
+
+# Bump whenever a migration is added so existing databases run it once
+SCHEMA_VERSION = 9
+
+# Indexes for the hot filter, sort and grouping paths
+INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_tx_acct_date ON transactions (account_id, date DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions (date DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_tx_type_date ON transactions (type, date);
+    CREATE INDEX IF NOT EXISTS idx_tx_cat_date ON transactions (category, date DESC, id DESC) WHERE category IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS idx_tx_type_category_date ON transactions (type, category, date);
+    CREATE INDEX IF NOT EXISTS idx_tx_recurring ON transactions (recurring_id);
+    CREATE INDEX IF NOT EXISTS idx_tx_month ON transactions (strftime('%Y-%m', date), type);
+    CREATE INDEX IF NOT EXISTS idx_rec_active ON recurring_transactions (is_active, end_date);
+    CREATE INDEX IF NOT EXISTS idx_accounts_name ON accounts (name);
+'''
+
+# Holds a row while batched_balances is posting a batch; only ever filled
+# inside a write transaction, so other connections always see it empty
+BALANCE_BATCH_TABLE = '''
+    CREATE TABLE IF NOT EXISTS balance_batch (active INTEGER)
+'''
+
+# Keep accounts.balance in step with every insert, delete and re-posting
+# of a transaction, so callers only ever write the transactions table.
+# Edits that leave the amount and account alone don't touch accounts.
+BALANCE_TRIGGERS = '''
+    CREATE TRIGGER IF NOT EXISTS trg_tx_insert_balance AFTER INSERT ON transactions
+    WHEN NOT EXISTS (SELECT 1 FROM balance_batch)
+    BEGIN
+        UPDATE accounts SET balance = balance + NEW.amount WHERE id = NEW.account_id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS trg_tx_delete_balance AFTER DELETE ON transactions
+    BEGIN
+        UPDATE accounts SET balance = balance - OLD.amount WHERE id = OLD.account_id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS trg_tx_update_balance AFTER UPDATE OF amount, account_id ON transactions
+    WHEN NEW.account_id != OLD.account_id
+    BEGIN
+        UPDATE accounts SET balance = balance - OLD.amount WHERE id = OLD.account_id;
+        UPDATE accounts SET balance = balance + NEW.amount WHERE id = NEW.account_id;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS trg_tx_amount_balance AFTER UPDATE OF amount, account_id ON transactions
+    WHEN NEW.account_id = OLD.account_id AND NEW.amount != OLD.amount
+    BEGIN
+        UPDATE accounts SET balance = balance + NEW.amount - OLD.amount WHERE id = NEW.account_id;
+    END;
+'''
+
+# Posts the net of every transaction inserted after :last_id, one UPDATE per account
+APPLY_INSERTED_BALANCES = '''
+    UPDATE accounts
+    SET balance = balance + (
+        SELECT SUM(amount) FROM transactions
+        WHERE account_id = accounts.id AND id > :last_id
+    )
+    WHERE id IN (SELECT account_id FROM transactions WHERE id > :last_id)
+'''
+
+# Tuning applied to every new connection
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',
+    # Writers queue behind a long CSV import rather than failing as locked
+    'PRAGMA busy_timeout = 30000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -20000',
+    'PRAGMA mmap_size = 268435456',
+    # Truncate the WAL back to 64 MB after checkpoints that follow big imports
+    'PRAGMA journal_size_limit = 67108864',
+    'PRAGMA foreign_keys = ON',
+)
+
+# Prepared statements kept per connection (sqlite3 defaults to 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections kept open per database file between app contexts
+POOL_SIZE = 8
+
+# Requests with these methods only read, so they get read-only connections
+READ_ONLY_METHODS = frozenset(['GET', 'HEAD'])
+
+# Database files already switched to WAL (the journal mode is persistent)
+_wal_databases = set()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Bumped by replacing() for a database file; connections opened under an
+# older generation may still point at the replaced file, so they are
+# closed on check-in instead of going back to the pool
+_pool_generations = {}
+
+# Connections checked out per database file, and the thread (if any) whose
+# replacing() block owns the file; other threads wait in get_db until the
+# owner is done, and the owner waits for the checked-out count to drain
+_checkouts = {}
+_replacing = {}
+_checkout_lock = threading.Condition()
+
+# Seconds replacing() waits for in-flight requests to hand connections back
+REPLACE_TIMEOUT = 30
+
+# Database files whose schema this process has already created or found
+_initialized_databases = set()
+_init_lock = threading.Lock()
+
+
+def _pool_for(db_path, readonly=False):
+    """Return the idle read-write (or read-only) connection pool for a database file."""
+    key = (db_path, readonly)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = queue.LifoQueue(maxsize=POOL_SIZE)
+        return pool
 
 
 class Database:
     """Database connection and query management."""
     
     @staticmethod
-    def get_connection():
+    def get_connection(readonly=False):
         """Get database connection with row factory."""
-        db = sqlite3.connect(current_app.config['DATABASE'])
+        db_path = current_app.config['DATABASE']
+        if readonly:
+            target, uri = Path(db_path).resolve().as_uri() + '?mode=ro', True
+        else:
+            target, uri = db_path, False
+        # Pooled connections move between server threads, one context at a time
+        db = sqlite3.connect(target, uri=uri, cached_statements=STATEMENT_CACHE_SIZE,
+                             check_same_thread=False)
         db.row_factory = sqlite3.Row
+        Database._configure(db, db_path, readonly)
         return db
     
+    @staticmethod
+    def _configure(db, db_path, readonly=False):
+        """Apply WAL journaling (once per file) and per-connection pragmas."""
+        if not readonly and db_path != ':memory:' and db_path not in _wal_databases:
+            db.execute('PRAGMA journal_mode = WAL')
+            _wal_databases.add(db_path)
+        for pragma in CONNECTION_PRAGMAS:
+            db.execute(pragma)
+    
     @staticmethod
     @contextmanager
     def get_db():
-        """Context manager for database connections."""
-        db = Database.get_connection()
+        """Context manager yielding the app context's shared connection.
+        
+        The connection is taken from the pool (or opened) on first use and
+        handed back when the app context is torn down; uncommitted work is
+        rolled back on error. GET and HEAD requests get a read-only
+        connection from a separate pool, so the read-write connections
+        are only ever used by writers.
+        """
+        db = g.get('_db')
+        if db is None:
+            db_path = current_app.config['DATABASE']
+            generation = Database._check_out(db_path)
+            try:
+                readonly = Database._read_only_context(db_path)
+                try:
+                    db = _pool_for(db_path, readonly).get_nowait()
+                except queue.Empty:
+                    db = Database.get_connection(readonly)
+            except Exception:
+                Database._check_in(db_path)
+                raise
+            g._db = db
+            g._db_pool = (db_path, readonly, generation)
         try:
             yield db
+        except Exception:
+            db.rollback()
+            raise
+    
+    @staticmethod
+    def _check_out(db_path):
+        """Count a connection to db_path as in use and return the pool generation.
+        
+        Waits while another thread is replacing the file.
+        """
+        me = threading.get_ident()
+        with _checkout_lock:
+            _checkout_lock.wait_for(lambda: _replacing.get(db_path, me) == me)
+            _checkouts[db_path] = _checkouts.get(db_path, 0) + 1
+            return _pool_generations.get(db_path, 0)
+    
+    @staticmethod
+    def _check_in(db_path):
+        """Count a connection to db_path as handed back."""
+        with _checkout_lock:
+            _checkouts[db_path] -= 1
+            _checkout_lock.notify_all()
+    
+    @staticmethod
+    def _read_only_context(db_path):
+        """Whether the current app context is a read-only request on an existing file."""
+        return (has_request_context() and request.method in READ_ONLY_METHODS
+                and db_path != ':memory:' and os.path.exists(db_path))
+    
+    @staticmethod
+    @contextmanager
+    def batched_balances(db):
+        """Post balances once per account for transactions inserted in the block.
+        
+        Must run inside the caller's write transaction, and the block may
+        only insert transactions. A balance_batch row switches the per-row
+        insert trigger off for the block; it is removed, and whatever was
+        inserted is posted, even if the block raises, so a caller that
+        commits partial work still leaves balances right.
+        """
+        last_id = db.execute('SELECT COALESCE(MAX(id), 0) FROM transactions').fetchone()[0]
+        db.execute('INSERT INTO balance_batch (active) VALUES (1)')
+        try:
+            yield
+        finally:
+            db.execute(APPLY_INSERTED_BALANCES, {'last_id': last_id})
+            db.execute('DELETE FROM balance_batch')
+    
+    @staticmethod
+    def close_db(exc=None):
+        """Return the app context's connection to the pool, if one was opened."""
+        db = g.pop('_db', None)
+        pool_key = g.pop('_db_pool', None)
+        if db is None:
+            return
+        if db.in_transaction:
+            db.rollback()
+        db_path, readonly, generation = pool_key
+        try:
+            if generation != _pool_generations.get(db_path, 0):
+                db.close()
+                return
+            try:
+                _pool_for(db_path, readonly).put_nowait(db)
+            except queue.Full:
+                db.close()
+        finally:
+            Database._check_in(db_path)
+    
+    @staticmethod
+    def close_pool(db_path):
+        """Close every idle pooled connection to a database file."""
+        for readonly in (False, True):
+            pool = _pool_for(db_path, readonly)
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+    
+    @staticmethod
+    @contextmanager
+    def replacing():
+        """Hold the database file exclusively while the block replaces its contents.
+        
+        Closes this context's connection, then waits for every connection
+        other threads have checked out to be handed back, so no request is
+        part way through a write when the file changes underneath it. New
+        checkouts from other threads wait until the block exits; this
+        thread may still use get_db inside it (e.g. to migrate). Raises
+        TimeoutError, leaving the file untouched, if connections are still
+        out after REPLACE_TIMEOUT seconds.
+        """
+        db_path = current_app.config['DATABASE']
+        Database.close_db()
+        me = threading.get_ident()
+        with _checkout_lock:
+            _checkout_lock.wait_for(lambda: db_path not in _replacing)
+            _replacing[db_path] = me
+            if not _checkout_lock.wait_for(lambda: not _checkouts.get(db_path),
+                                           timeout=REPLACE_TIMEOUT):
+                del _replacing[db_path]
+                _checkout_lock.notify_all()
+                raise TimeoutError('Database is still in use; try again shortly')
+            _pool_generations[db_path] = _pool_generations.get(db_path, 0) + 1
+        # The next connection re-applies WAL mode and the schema check
+        Database.close_pool(db_path)
+        _wal_databases.discard(db_path)
+        _initialized_databases.discard(db_path)
+        try:
+            yield
         finally:
-            db.close()
+            with _checkout_lock:
+                del _replacing[db_path]
+                _checkout_lock.notify_all()
+    
+    @staticmethod
+    def init_app(app):
+        """Register connection teardown on the Flask app."""
+        app.teardown_appcontext(Database.close_db)
+    
+    @staticmethod
+    def warm_cache():
+        """Read the main tables once so their pages sit in the OS page cache."""
+        with Database.get_db() as db:
+            db.execute('SELECT COUNT(*), SUM(balance) FROM accounts').fetchone()
+            db.execute('SELECT COUNT(*), SUM(amount) FROM transactions').fetchone()
+    
+    @staticmethod
+    def migrate():
+        """Run pending migrations, skipping them once the schema is current."""
+        # Tables added since the file was created (payees, categories, ...)
+        Database.init_db()
+        with Database.get_db() as db:
+            version = db.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            Database.migrate_add_project_column()
+            Database.migrate_add_increment_column()
+            Database.migrate_add_projects_table()
+            Database.migrate_add_project_category_notes()
+            Database.migrate_add_indexes()
+            Database.migrate_add_balance_triggers()
+            
+            with Database.get_db() as db:
+                db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                db.commit()
+        
+        Database.clear_balance_batch()
+    
+    @staticmethod
+    def clear_balance_batch():
+        """Remove any balance_batch flag left behind, re-enabling the insert trigger.
+        
+        batched_balances only holds its row inside an open write
+        transaction, but a file written by a process that committed
+        mid-batch and then died would otherwise skip balances for good.
+        """
+        with Database.get_db() as db:
+            db.execute('DELETE FROM balance_batch')
+            db.commit()
+    
+    @staticmethod
+    def migrate_add_indexes():
+        """Create indexes missing from databases built by older versions."""
+        with Database.get_db() as db:
+            # Superseded by idx_tx_cat_date in schema version 8
+            db.execute('DROP INDEX IF EXISTS idx_tx_category')
+            db.executescript(INDEXES)
+            # Existing data: give the planner statistics for the new indexes
+            db.execute('ANALYZE')
+            db.commit()
+    
+    @staticmethod
+    def migrate_add_balance_triggers():
+        """Create the triggers that maintain account balances."""
+        with Database.get_db() as db:
+            # Replace the unconditional update trigger of schema version 5
+            # and the ungated insert trigger of versions before 9
+            db.execute('DROP TRIGGER IF EXISTS trg_tx_update_balance')
+            db.execute('DROP TRIGGER IF EXISTS trg_tx_insert_balance')
+            db.executescript(BALANCE_BATCH_TABLE + ';' + BALANCE_TRIGGERS)
     
     @staticmethod
     def migrate_add_project_column():
@@ -96,8 +435,27 @@ class Database:
     
     @staticmethod
     def init_db():
-        """Initialize the database with tables."""
+        """Initialize the database with tables.
+        
+        Runs once per file per process. Missing tables are created in any
+        file, but one that already has a schema is left to migrate() rather
+        than re-stamped at the current version.
+        """
+        db_path = current_app.config['DATABASE']
+        with _init_lock:
+            if db_path in _initialized_databases:
+                return
+            Database._create_schema()
+            _initialized_databases.add(db_path)
+    
+    @staticmethod
+    def _create_schema():
+        """Create any missing tables, and a new file's indexes, triggers and version."""
         with Database.get_db() as db:
+            version = db.execute('PRAGMA user_version').fetchone()[0]
+            existing = version > 0 or db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'accounts'"
+            ).fetchone()
             db.executescript('''
                 CREATE TABLE IF NOT EXISTS accounts (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -160,7 +518,15 @@ class Database:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL UNIQUE,
                     description TEXT,
+                    category TEXT,
+                    notes TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
             ''')
+            if existing:
+                # Older files get their indexes, triggers and version from migrate()
+                return
+            db.executescript(INDEXES)
+            db.executescript(BALANCE_BATCH_TABLE + ';' + BALANCE_TRIGGERS)
+            db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
             db.commit()
\ No newline at end of file
@@ -1,6 +1,13 @@
 """Account operations and queries."""
+import json
 from ..database import Database
 
+# Account types are bound as a JSON array (or NULL for all accounts)
+TOTAL_BALANCE_SQL = '''
+    SELECT SUM(balance) FROM accounts
+    WHERE :types IS NULL OR type IN (SELECT value FROM json_each(:types))
+'''
+
 
 def get_all():
     """Get all accounts ordered by type and name."""
@@ -29,37 +36,25 @@ def update(account_id, name, account_type):
         db.commit()
 
 
-def update_balance(account_id, amount, db=None):
-    """Update account balance by adding amount."""
-    if db:
-        # Use existing connection
-        db.execute(
-            'UPDATE accounts SET balance = balance + ? WHERE id = ?',
-            (amount, account_id)
-        )
-    else:
-        # Create new connection (for standalone use)
-        with Database.get_db() as db:
-            db.execute(
-                'UPDATE accounts SET balance = balance + ? WHERE id = ?',
-                (amount, account_id)
-            )
-            db.commit()
-
-
 def get_by_id(account_id):
     """Get account by ID."""
     with Database.get_db() as db:
         return db.execute('SELECT * FROM accounts WHERE id = ?', (account_id,)).fetchone()
 
 
+def get_existing_ids(account_ids):
+    """Return which of the given account ids exist, checked in one query."""
+    with Database.get_db() as db:
+        rows = db.execute(
+            'SELECT id FROM accounts WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(list(account_ids)),)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+
 def get_total_balance(account_types=None):
     """Get total balance across accounts, optionally filtered by types."""
     with Database.get_db() as db:
-        if account_types:
-            placeholders = ",".join(["?" for _ in account_types])
-            query = f'SELECT SUM(balance) FROM accounts WHERE type IN ({placeholders})'
-            result = db.execute(query, account_types).fetchone()[0]
-        else:
-            result = db.execute('SELECT SUM(balance) FROM accounts').fetchone()[0]
+        types = json.dumps(list(account_types)) if account_types else None
+        result = db.execute(TOTAL_BALANCE_SQL, {'types': types}).fetchone()[0]
         return result or 0
\ No newline at end of file
@@ -1,6 +1,6 @@
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from ..database import Database
 
 # Simple CPU setup for transformers
@@ -371,7 +371,7 @@ Return JSON:
     
     def _get_date_range(self, period):
         """Convert period string to date range."""
-        now = datetime.now()
+        now = date.today()
         
         ranges = {
             'today': (now, now),
@@ -385,7 +385,7 @@ Return JSON:
         
         if period in ranges:
             start, end = ranges[period]
-            return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+            return start.isoformat(), end.isoformat()
         return None, None
     
     def _get_last_month_range(self, now):
@@ -397,17 +397,16 @@ Return JSON:
     
     def _parse_custom_date(self, date_str):
         """Parse flexible date strings into date ranges."""
-        from datetime import datetime
         import re
         
         date_str = date_str.lower().strip()
-        now = datetime.now()
+        now = date.today()
         
         try:
             # YYYY-MM-DD format
             if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-                date = datetime.strptime(date_str, '%Y-%m-%d')
-                return date.strftime('%Y-%m-%d'), date.strftime('%Y-%m-%d')
+                day = date.fromisoformat(date_str).isoformat()
+                return day, day
             
             # YYYY-MM format
             elif re.match(r'^\d{4}-\d{2}$', date_str):
@@ -418,8 +417,8 @@ Return JSON:
                     end_year, end_month = int(year) + 1, 1
                 else:
                     end_year, end_month = int(year), int(month) + 1
-                end_date = datetime(end_year, end_month, 1) - timedelta(days=1)
-                return start, end_date.strftime('%Y-%m-%d')
+                end_date = date(end_year, end_month, 1) - timedelta(days=1)
+                return start, end_date.isoformat()
             
             # Month names
             elif any(month in date_str for month in ['january', 'february', 'march', 'april', 'may', 'june', 
@@ -439,8 +438,8 @@ Return JSON:
                             end_year, end_month = year + 1, 1
                         else:
                             end_year, end_month = year, month_num + 1
-                        end_date = datetime(end_year, end_month, 1) - timedelta(days=1)
-                        return start, end_date.strftime('%Y-%m-%d')
+                        end_date = date(end_year, end_month, 1) - timedelta(days=1)
+                        return start, end_date.isoformat()
             
         except:
             pass
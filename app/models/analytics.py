@@ -1,198 +1,152 @@
 """Analytics queries and calculations."""
+import json
+from collections import defaultdict
+from functools import lru_cache
 from ..database import Database
 
 
+@lru_cache(maxsize=32)
+def _render(template, has_start, has_end, has_types):
+    """Substitute the filter predicates present into a query template.
+    
+    Only eight filter combinations exist per template, so each assembled
+    query string is built once and then reused (as is its statement in
+    the connection's cache).
+    """
+    filters = ''
+    if has_start:
+        filters += ' AND t.date >= ?'
+    if has_end:
+        filters += ' AND t.date <= ?'
+    if has_types:
+        filters += ' AND a.type IN (SELECT value FROM json_each(?))'
+    return template.format(filters=filters)
+
+
+def _filtered_query(template, start_date=None, end_date=None, account_types=None):
+    """Return the template's query and parameters for the shared filters.
+    
+    Dates use plain range comparisons on the ISO strings so the
+    (type, date) index can serve them. Account types are bound as one
+    JSON array, so the SQL text (and its cached statement) is the same
+    however many types are selected.
+    """
+    params = [value for value in (start_date, end_date) if value]
+    if account_types:
+        params.append(json.dumps(list(account_types)))
+    
+    query = _render(template, bool(start_date), bool(end_date), bool(account_types))
+    return query, params
+
+
 def get_stats(start_date=None, end_date=None, account_types=None):
-        """Get financial statistics with filters."""
+        """Get financial statistics with filters, including the total balance.
+        
+        The balance of the selected account types is read by a scalar
+        subquery in the same statement as the income/expense sums.
+        """
         with Database.get_db() as db:
-            # Build filters
-            date_filter = ''
-            account_filter = ''
-            params_income = []
-            params_expense = []
-            
-            if start_date and end_date:
-                date_filter = ' AND t.date BETWEEN ? AND ?'
-                params_income.extend([start_date, end_date])
-                params_expense.extend([start_date, end_date])
-            elif start_date:
-                date_filter = ' AND t.date >= ?'
-                params_income.append(start_date)
-                params_expense.append(start_date)
-            elif end_date:
-                date_filter = ' AND t.date <= ?'
-                params_income.append(end_date)
-                params_expense.append(end_date)
-            
-            if account_types:
-                placeholders = ",".join(["?" for _ in account_types])
-                account_filter = f' AND a.type IN ({placeholders})'
-                params_income.extend(account_types)
-                params_expense.extend(account_types)
-            
-            # Income query
-            income_query = f'''
-                SELECT SUM(t.amount) FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.type = 'income'{date_filter}{account_filter}
-            '''
-            
-            # Expense query
-            expense_query = f'''
-                SELECT SUM(t.amount) FROM transactions t
+            query = '''
+                SELECT 
+                    (
+                        SELECT SUM(balance) FROM accounts
+                        WHERE ? IS NULL OR type IN (SELECT value FROM json_each(?))
+                    ) as total_balance,
+                    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) as income,
+                    SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) as expenses
+                FROM transactions t
                 JOIN accounts a ON t.account_id = a.id
-                WHERE t.type = 'expense'{date_filter}{account_filter}
+                WHERE t.type IN ('income', 'expense'){filters}
             '''
+            query, params = _filtered_query(query, start_date, end_date, account_types)
+            types = json.dumps(list(account_types)) if account_types else None
             
-            income = db.execute(income_query, params_income).fetchone()[0] or 0
-            expenses = abs(db.execute(expense_query, params_expense).fetchone()[0] or 0)
+            row = db.execute(query, [types, types] + params).fetchone()
+            income = row['income'] or 0
+            expenses = abs(row['expenses'] or 0)
             
             return {
                 'monthly_income': income,
                 'monthly_expenses': expenses,
-                'net_monthly': income - expenses
+                'net_monthly': income - expenses,
+                'total_balance': row['total_balance'] or 0
             }
     
-def get_category_spending(start_date=None, end_date=None, account_types=None):
-        """Get spending by category."""
-        with Database.get_db() as db:
-            date_filter = ''
-            account_filter = ''
-            params = []
-            
-            if start_date and end_date:
-                date_filter = ' AND t.date BETWEEN ? AND ?'
-                params.extend([start_date, end_date])
-            elif start_date:
-                date_filter = ' AND t.date >= ?'
-                params.append(start_date)
-            elif end_date:
-                date_filter = ' AND t.date <= ?'
-                params.append(end_date)
-            
-            if account_types:
-                placeholders = ",".join(["?" for _ in account_types])
-                account_filter = f' AND a.type IN ({placeholders})'
-                params.extend(account_types)
-            
-            query = f'''
-                SELECT t.category, SUM(ABS(t.amount)) as total
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.type = 'expense' AND t.category IS NOT NULL{date_filter}{account_filter}
-                GROUP BY t.category
-                ORDER BY total DESC
-            '''
-            
-            return db.execute(query, params).fetchall()
+def get_chart_summary(start_date=None, end_date=None, account_types=None):
+    """Get category spending, monthly trend and category trends in one scan.
     
-def get_monthly_trend(start_date=None, end_date=None, account_types=None):
-        """Get monthly income/expense/savings/investment trend."""
-        with Database.get_db() as db:
-            date_filter = ''
-            account_filter = ''
-            params = []
-            
-            if start_date and end_date:
-                date_filter = ' AND t.date BETWEEN ? AND ?'
-                params.extend([start_date, end_date])
-            elif start_date:
-                date_filter = ' AND t.date >= ?'
-                params.append(start_date)
-            elif end_date:
-                date_filter = ' AND t.date <= ?'
-                params.append(end_date)
-            
-            if account_types:
-                placeholders = ",".join(["?" for _ in account_types])
-                account_filter = f' AND a.type IN ({placeholders})'
-                params.extend(account_types)
-            
-            query = f'''
-                SELECT 
-                    strftime('%Y-%m', t.date) as month,
-                    SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) as income,
-                    SUM(CASE WHEN t.type = 'expense' THEN ABS(t.amount) ELSE 0 END) as expenses,
-                    SUM(CASE 
-                        WHEN a.type = 'savings' AND t.type = 'transfer' THEN t.amount 
-                        ELSE 0 
-                    END) as savings,
-                    SUM(CASE 
-                        WHEN a.type = 'investment' AND t.type = 'transfer' THEN t.amount 
-                        ELSE 0 
-                    END) as investments
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE 1=1{date_filter}{account_filter}
-                GROUP BY month
-                ORDER BY month DESC
-                LIMIT 12
-            '''
-            
-            trends = db.execute(query, params).fetchall()
-            return list(reversed(trends))
+    Returns (categories, trends, category_trends): category totals by
+    spend, the last 12 months of income/expenses/savings/investments
+    (oldest first) and per-month category totals, all derived from a
+    single GROUP BY over month, transaction type and category. Dates
+    strftime can't read have no month: they count towards category
+    totals but not the month-keyed series.
+    """
+    with Database.get_db() as db:
+        query = '''
+            SELECT 
+                strftime('%Y-%m', t.date) as month,
+                t.type,
+                CASE WHEN t.type = 'transfer' THEN a.type END as account_type,
+                CASE WHEN t.type = 'expense' THEN t.category END as category,
+                SUM(t.amount) as total,
+                SUM(ABS(t.amount)) as abs_total
+            FROM transactions t
+            JOIN accounts a ON t.account_id = a.id
+            WHERE 1=1{filters}
+            GROUP BY month, t.type, account_type, category
+            ORDER BY month DESC, abs_total DESC
+        '''
+        query, params = _filtered_query(query, start_date, end_date, account_types)
+        
+        rows = db.execute(query, params).fetchall()
     
-def get_category_trends(start_date=None, end_date=None, account_types=None):
-        """Get category trends over time."""
-        with Database.get_db() as db:
-            date_filter = ''
-            account_filter = ''
-            params = []
-            
-            if start_date and end_date:
-                date_filter = ' AND t.date BETWEEN ? AND ?'
-                params.extend([start_date, end_date])
-            elif start_date:
-                date_filter = ' AND t.date >= ?'
-                params.append(start_date)
-            elif end_date:
-                date_filter = ' AND t.date <= ?'
-                params.append(end_date)
-            
-            if account_types:
-                placeholders = ",".join(["?" for _ in account_types])
-                account_filter = f' AND a.type IN ({placeholders})'
-                params.extend(account_types)
-            
-            query = f'''
-                SELECT 
-                    strftime('%Y-%m', t.date) as month,
-                    t.category,
-                    SUM(ABS(t.amount)) as total
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.type = 'expense' AND t.category IS NOT NULL{date_filter}{account_filter}
-                GROUP BY month, t.category
-                ORDER BY month DESC, total DESC
-            '''
-            
-            return db.execute(query, params).fetchall()
+    category_totals = defaultdict(int)
+    category_trends = []
+    monthly = {}
+    
+    # Rows arrive newest month first, largest totals first within a month
+    for row in rows:
+        month = row['month']
+        trans_type = row['type']
+        category = row['category']
+        if category is not None:
+            category_totals[category] += row['abs_total']
+        if month is None:
+            continue
+        
+        trend = monthly.get(month)
+        if trend is None:
+            trend = monthly[month] = {
+                'month': month, 'income': 0, 'expenses': 0, 'savings': 0, 'investments': 0
+            }
+        
+        if trans_type == 'income':
+            trend['income'] += row['total']
+        elif trans_type == 'expense':
+            trend['expenses'] += row['abs_total']
+            if category is not None:
+                category_trends.append({
+                    'month': month, 'category': category, 'total': row['abs_total']
+                })
+        elif trans_type == 'transfer':
+            if row['account_type'] == 'savings':
+                trend['savings'] += row['total']
+            elif row['account_type'] == 'investment':
+                trend['investments'] += row['total']
+    
+    categories = [
+        {'category': category, 'total': total}
+        for category, total in sorted(category_totals.items(), key=lambda item: item[1], reverse=True)
+    ]
+    trends = list(monthly.values())[:12][::-1]
+    
+    return categories, trends, category_trends
 
 def get_top_payees(start_date=None, end_date=None, account_types=None, limit=10):
     """Get top payees by spending amount."""
     with Database.get_db() as db:
-        date_filter = ''
-        account_filter = ''
-        params = []
-        
-        if start_date and end_date:
-            date_filter = ' AND t.date BETWEEN ? AND ?'
-            params.extend([start_date, end_date])
-        elif start_date:
-            date_filter = ' AND t.date >= ?'
-            params.append(start_date)
-        elif end_date:
-            date_filter = ' AND t.date <= ?'
-            params.append(end_date)
-        
-        if account_types:
-            placeholders = ",".join(["?" for _ in account_types])
-            account_filter = f' AND a.type IN ({placeholders})'
-            params.extend(account_types)
-        
-        params.append(limit)
-        
-        query = f'''
+        query = '''
             SELECT 
                 COALESCE(t.payee, 'Unknown') as payee,
                 SUM(ABS(t.amount)) as total
@@ -200,37 +154,20 @@ def get_top_payees(start_date=None, end_date=None, account_types=None, limit=10)
             JOIN accounts a ON t.account_id = a.id
             WHERE t.type = 'expense' 
             AND t.payee IS NOT NULL 
-            AND t.payee != ''{date_filter}{account_filter}
+            AND t.payee != ''{filters}
             GROUP BY t.payee
             ORDER BY total DESC
             LIMIT ?
         '''
+        query, params = _filtered_query(query, start_date, end_date, account_types)
+        params.append(limit)
         
         return db.execute(query, params).fetchall()
 
 def get_savings_investments_flow(start_date=None, end_date=None, account_types=None):
     """Get monthly savings and investments flow data."""
     with Database.get_db() as db:
-        date_filter = ''
-        account_filter = ''
-        params = []
-        
-        if start_date and end_date:
-            date_filter = ' AND t.date BETWEEN ? AND ?'
-            params.extend([start_date, end_date])
-        elif start_date:
-            date_filter = ' AND t.date >= ?'
-            params.append(start_date)
-        elif end_date:
-            date_filter = ' AND t.date <= ?'
-            params.append(end_date)
-        
-        if account_types:
-            placeholders = ",".join(["?" for _ in account_types])
-            account_filter = f' AND a.type IN ({placeholders})'
-            params.extend(account_types)
-        
-        query = f'''
+        query = '''
             SELECT 
                 strftime('%Y-%m', t.date) as month,
                 SUM(CASE 
@@ -251,11 +188,12 @@ def get_savings_investments_flow(start_date=None, end_date=None, account_types=N
                 END) as income
             FROM transactions t
             JOIN accounts a ON t.account_id = a.id
-            WHERE 1=1{date_filter}{account_filter}
+            WHERE 1=1{filters}
             GROUP BY month
             ORDER BY month DESC
             LIMIT 12
         '''
+        query, params = _filtered_query(query, start_date, end_date, account_types)
         
         results = db.execute(query, params).fetchall()
         return list(reversed(results))
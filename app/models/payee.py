@@ -4,12 +4,20 @@ from ..database import Database
 
 
 def get_all():
-    """Get all payees including account-based payees."""
+    """Get all payees including account-based payees.
+    
+    UNION ALL over the two name indexes lets SQLite merge the sorted
+    lists directly; only payee rows that duplicate an account are
+    filtered out, which is all the UNION's deduplication removed.
+    """
     with Database.get_db() as db:
         return db.execute('''
             SELECT p.name, p.is_account, p.account_id
             FROM payees p
-            UNION
+            WHERE NOT (p.is_account = 1 AND EXISTS (
+                SELECT 1 FROM accounts a WHERE a.id = p.account_id AND a.name = p.name
+            ))
+            UNION ALL
             SELECT a.name, 1 as is_account, a.id as account_id
             FROM accounts a
             ORDER BY name
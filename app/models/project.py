@@ -1,5 +1,6 @@
 """Project operations and queries."""
 from ..database import Database
+from ..utils.responses import rows_to_dicts
 
 
 def get_all():
@@ -61,7 +62,7 @@ def get_project_analytics(project_id):
         ''', (project['name'],)).fetchone()
         
         # Get spending by category
-        categories = db.execute('''
+        categories = rows_to_dicts(db.execute('''
             SELECT 
                 category,
                 SUM(ABS(amount)) as total,
@@ -70,22 +71,22 @@ def get_project_analytics(project_id):
             WHERE project = ? AND amount < 0
             GROUP BY category
             ORDER BY total DESC
-        ''', (project['name'],)).fetchall()
+        ''', (project['name'],)))
         
         # Get all transactions (remove limit for filtering)
-        recent_transactions = db.execute('''
+        recent_transactions = rows_to_dicts(db.execute('''
             SELECT t.*, a.name as account_name
             FROM transactions t
             JOIN accounts a ON t.account_id = a.id
             WHERE t.project = ?
             ORDER BY t.date DESC, t.created_at DESC
-        ''', (project['name'],)).fetchall()
+        ''', (project['name'],)))
         
         return {
             'project': dict(project),
             'totals': dict(totals) if totals else {'total_spent': 0, 'total_earned': 0, 'transaction_count': 0},
-            'categories': [dict(cat) for cat in categories],
-            'recent_transactions': [dict(t) for t in recent_transactions]
+            'categories': categories,
+            'recent_transactions': recent_transactions
         }
 
 
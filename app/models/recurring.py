@@ -1,26 +1,85 @@
 """Recurring transaction operations and queries."""
-from datetime import datetime, timedelta
 from ..database import Database
-from . import transaction
+
+# Step of each supported frequency, in days or in calendar months
+FREQUENCY_DAYS = {'daily': 1, 'weekly': 7, 'biweekly': 14}
+FREQUENCY_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+
+def _next_date_sql(previous, frequency, start_date):
+    """SQL for the occurrence after previous; NULL for an unknown frequency.
+    
+    Month steps land on start_date's day of the month, clamped to the last
+    day of shorter months, so a schedule started on the 31st runs on Feb 28
+    and then Mar 31 rather than drifting (SQLite's '+1 month' would roll
+    Jan 31 over to Mar 3).
+    """
+    days = f'CASE {frequency} ' + ' '.join(
+        f"WHEN '{name}' THEN {n}" for name, n in FREQUENCY_DAYS.items()
+    ) + ' END'
+    months = f'CASE {frequency} ' + ' '.join(
+        f"WHEN '{name}' THEN {n}" for name, n in FREQUENCY_MONTHS.items()
+    ) + ' END'
+    month_start = f"date({previous}, 'start of month', '+' || {months} || ' months')"
+    return f'''CASE
+        WHEN {days} IS NOT NULL THEN date({previous}, '+' || {days} || ' days')
+        ELSE min(
+            date({month_start}, '+' || (CAST(strftime('%d', COALESCE({start_date}, {previous})) AS INTEGER) - 1) || ' days'),
+            date({month_start}, '+1 month', '-1 day')
+        )
+    END'''
+
+
+# Active schedules with the date each one next falls due
+ACTIVE_SQL = f'''
+    SELECT r.*, a.name as account_name,
+    {_next_date_sql('r.last_processed', 'r.frequency', 'r.start_date')} as next_date
+    FROM recurring_transactions r
+    JOIN accounts a ON r.account_id = a.id
+    WHERE r.is_active = 1
+'''
+
+# Expands every active schedule into one row per due occurrence (leg 0),
+# plus the credit leg (1) of transfers whose destination account exists.
+# Occurrence n is charged amount + n * increment_amount.
+DUE_LEGS_SQL = f'''
+    CREATE TEMP TABLE due_legs AS
+    WITH RECURSIVE due(recurring_id, n, date) AS (
+        SELECT id, 1, {_next_date_sql('last_processed', 'frequency', 'start_date')}
+        FROM recurring_transactions
+        WHERE is_active = 1 AND (end_date IS NULL OR end_date >= date('now', 'localtime'))
+        UNION ALL
+        SELECT d.recurring_id, d.n + 1, {_next_date_sql('d.date', 'r.frequency', 'r.start_date')}
+        FROM due d
+        JOIN recurring_transactions r ON r.id = d.recurring_id
+        WHERE d.date <= date('now', 'localtime')
+    ),
+    occurrences AS (
+        SELECT r.*, d.date, r.amount + d.n * COALESCE(r.increment_amount, 0) AS due_amount,
+               r.type = 'transfer' AND COALESCE(r.payee, '') != '' AS is_transfer,
+               (SELECT MIN(id) FROM accounts WHERE name = r.payee) AS dest_id,
+               (SELECT name FROM accounts WHERE id = r.account_id) AS source_name
+        FROM due d
+        JOIN recurring_transactions r ON r.id = d.recurring_id
+        WHERE d.date <= date('now', 'localtime')
+    )
+    SELECT id AS recurring_id, 0 AS leg, account_id,
+           CASE WHEN type = 'expense' OR is_transfer THEN -ABS(due_amount) ELSE ABS(due_amount) END AS amount,
+           date, type, payee, category, notes, project,
+           is_transfer AND dest_id IS NULL AS missing_destination
+    FROM occurrences
+    UNION ALL
+    SELECT id, 1, dest_id, ABS(due_amount), date, type, COALESCE(source_name, 'Transfer'),
+           category, notes, project, 0
+    FROM occurrences
+    WHERE is_transfer AND dest_id IS NOT NULL
+'''
 
 
 def get_all_active():
         """Get all active recurring transactions with next dates."""
         with Database.get_db() as db:
-            return db.execute('''
-                SELECT r.*, a.name as account_name,
-                CASE 
-                    WHEN r.frequency = 'daily' THEN date(r.last_processed, '+1 day')
-                    WHEN r.frequency = 'weekly' THEN date(r.last_processed, '+7 days')
-                    WHEN r.frequency = 'biweekly' THEN date(r.last_processed, '+14 days')
-                    WHEN r.frequency = 'monthly' THEN date(r.last_processed, '+1 month')
-                    WHEN r.frequency = 'quarterly' THEN date(r.last_processed, '+3 months')
-                    WHEN r.frequency = 'yearly' THEN date(r.last_processed, '+1 year')
-                END as next_date
-                FROM recurring_transactions r
-                JOIN accounts a ON r.account_id = a.id
-                WHERE r.is_active = 1
-            ''').fetchall()
+            return db.execute(ACTIVE_SQL).fetchall()
     
 def create(account_id, amount, trans_type, payee, category, notes, project, 
            frequency, start_date, end_date=None, increment_amount=0):
@@ -46,108 +105,40 @@ def deactivate(recurring_id):
             db.commit()
     
 def process_due():
-        """Process all due recurring transactions."""
-        today = datetime.now().date()
-        processed = 0
-        
-        # First, get all recurring transactions that need processing
+        """Process all due recurring transactions with set-based SQL."""
         with Database.get_db() as db:
-            recurring = db.execute('''
-                SELECT * FROM recurring_transactions 
-                WHERE is_active = 1 AND (end_date IS NULL OR end_date >= ?)
-            ''', (today,)).fetchall()
-        
-        # Process each recurring transaction separately to avoid database locks
-        for r in recurring:
-            last_processed = datetime.strptime(r['last_processed'], '%Y-%m-%d').date()
-            current_amount = r['amount']
-            try:
-                increment_amount = r['increment_amount'] or 0
-            except (KeyError, IndexError):
-                increment_amount = 0
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(DUE_LEGS_SQL)
             
-            # Process all missed occurrences up to today
-            next_date = _calculate_next_date(last_processed, r['frequency'])
-            original_last_processed = last_processed
+            for row in db.execute('''
+                SELECT DISTINCT payee FROM temp.due_legs WHERE missing_destination = 1
+            '''):
+                print(f"Warning: Destination account '{row['payee']}' not found for recurring transfer")
             
-            while next_date <= today:
-                # Apply increment before creating transaction
-                current_amount += increment_amount
-                
-                # Handle transfers differently from regular transactions
-                if r['type'] == 'transfer' and r['payee']:
-                    # For transfers, payee contains the destination account name
-                    # Find the destination account ID by name
-                    with Database.get_db() as db:
-                        dest_account = db.execute(
-                            'SELECT id FROM accounts WHERE name = ?', (r['payee'],)
-                        ).fetchone()
-                    
-                    if dest_account:
-                        # Create transfer (both debit and credit transactions)
-                        transaction.create_transfer(
-                            r['account_id'], dest_account['id'], 
-                            abs(current_amount), next_date,
-                            r['payee'], r['category'], r['notes'], r['project'], r['id']
-                        )
-                    else:
-                        # Fallback: create single transaction if dest account not found
-                        print(f"Warning: Destination account '{r['payee']}' not found for recurring transfer")
-                        transaction.create(
-                            r['account_id'], -abs(current_amount), next_date, r['type'],
-                            r['payee'], r['category'], r['notes'], r['project'], r['id']
-                        )
-                else:
-                    # Regular transaction (income/expense)
-                    amount = current_amount
-                    if r['type'] == 'expense':
-                        amount = -abs(current_amount)
-                    else:
-                        amount = abs(current_amount)
-                        
-                    transaction.create(
-                        r['account_id'], amount, next_date, r['type'],
-                        r['payee'], r['category'], r['notes'], r['project'], r['id']
-                    )
-                
-                processed += 1
-                
-                # Update for next iteration
-                last_processed = next_date
-                next_date = _calculate_next_date(next_date, r['frequency'])
+            processed = db.execute(
+                'SELECT COUNT(*) FROM temp.due_legs WHERE leg = 0'
+            ).fetchone()[0]
             
-            # Update the database only if this recurring transaction had occurrences
-            if last_processed != original_last_processed:
-                with Database.get_db() as db:
-                    db.execute(
-                        'UPDATE recurring_transactions SET last_processed = ?, amount = ? WHERE id = ?',
-                        (last_processed, current_amount, r['id'])
+            with Database.batched_balances(db):
+                db.execute('''
+                    INSERT INTO transactions 
+                    (account_id, amount, date, type, payee, category, notes, project, recurring_id)
+                    SELECT account_id, amount, date, type, payee, category, notes, project, recurring_id
+                    FROM temp.due_legs
+                    ORDER BY recurring_id, date, leg
+                ''')
+            db.execute('''
+                UPDATE recurring_transactions 
+                SET last_processed = (
+                        SELECT MAX(date) FROM temp.due_legs WHERE recurring_id = recurring_transactions.id
+                    ),
+                    amount = amount + COALESCE(increment_amount, 0) * (
+                        SELECT COUNT(*) FROM temp.due_legs 
+                        WHERE recurring_id = recurring_transactions.id AND leg = 0
                     )
-                    db.commit()
+                WHERE id IN (SELECT recurring_id FROM temp.due_legs)
+            ''')
+            db.execute('DROP TABLE temp.due_legs')
+            db.commit()
         
         return processed
-    
-def _calculate_next_date(last_date, frequency):
-        """Calculate the next date for a recurring transaction."""
-        if frequency == 'daily':
-            return last_date + timedelta(days=1)
-        elif frequency == 'weekly':
-            return last_date + timedelta(weeks=1)
-        elif frequency == 'biweekly':
-            return last_date + timedelta(weeks=2)
-        elif frequency == 'monthly':
-            if last_date.month == 12:
-                return last_date.replace(year=last_date.year + 1, month=1)
-            else:
-                return last_date.replace(month=last_date.month + 1)
-        elif frequency == 'quarterly':
-            month = last_date.month + 3
-            year = last_date.year
-            if month > 12:
-                month = month - 12
-                year = year + 1
-            return last_date.replace(year=year, month=month)
-        elif frequency == 'yearly':
-            return last_date.replace(year=last_date.year + 1)
-        
-        return last_date
\ No newline at end of file
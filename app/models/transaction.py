@@ -1,19 +1,68 @@
 """Transaction operations and queries."""
-from datetime import datetime, timedelta
+import json
+from functools import lru_cache
 from ..database import Database
-from . import account
 
+# Base query for the transaction list; filters are appended as bound parameters
+FILTERED_SELECT = '''
+    SELECT t.*, a.name as account_name, r.frequency
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    LEFT JOIN recurring_transactions r ON t.recurring_id = r.id
+    WHERE 1=1
+'''
 
-def get_filtered(account_id=None, category=None, trans_type=None, date_from=None, date_to=None, search=None, limit=100):
-        """Get transactions with filters."""
+INSERT_TRANSACTION = '''
+    INSERT INTO transactions 
+    (account_id, amount, date, type, payee, category, notes, project, recurring_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Re-posts a transaction in one statement. SET expressions see the row's
+# old values, so a transfer leg keeps its direction from the old amount's
+# sign and takes the other account's name as its payee.
+UPDATE_TRANSACTION = '''
+    UPDATE transactions 
+    SET account_id = :account_id,
+        amount = CASE
+            WHEN :transfer_account_id IS NOT NULL
+                THEN CASE WHEN amount < 0 THEN -ABS(:amount) ELSE ABS(:amount) END
+            WHEN :type = 'expense' THEN -ABS(:amount)
+            ELSE ABS(:amount)
+        END,
+        date = :date,
+        type = :type,
+        payee = CASE
+            WHEN :transfer_account_id IS NOT NULL THEN COALESCE((
+                SELECT name FROM accounts
+                WHERE id = CASE WHEN amount < 0 THEN :transfer_account_id ELSE :account_id END
+            ), 'Transfer')
+            ELSE :payee
+        END,
+        category = :category,
+        notes = :notes,
+        project = :project
+    WHERE id = :id
+'''
+
+# Base query for the analytics drill-down lists; only the columns their
+# tables show, so rows and responses don't carry the whole record
+ACCOUNT_TRANSACTIONS_SELECT = '''
+    SELECT t.id, t.amount, t.date, t.type, t.payee, t.category, t.notes,
+           a.name as account_name
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+'''
+
+def get_filtered(account_id=None, category=None, trans_type=None, date_from=None, date_to=None, search=None, limit=100,
+                 cursor=None):
+        """Get transactions with filters.
+        
+        cursor is the (date, id) of the last row of the previous page; the
+        page continues strictly after it in the list's date/id order.
+        """
         with Database.get_db() as db:
-            query = '''
-                SELECT t.*, a.name as account_name, r.frequency
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                LEFT JOIN recurring_transactions r ON t.recurring_id = r.id
-                WHERE 1=1
-            '''
+            query = FILTERED_SELECT
             params = []
             
             if account_id:
@@ -46,6 +95,10 @@ def get_filtered(account_id=None, category=None, trans_type=None, date_from=None
                 )'''
                 params.extend([search_term, search_term, search_term, search_term])
             
+            if cursor:
+                query += ' AND (t.date, t.id) < (?, ?)'
+                params.extend(cursor)
+            
             query += ' ORDER BY t.date DESC, t.id DESC LIMIT ?'
             params.append(limit)
             
@@ -55,165 +108,105 @@ def create(account_id, amount, date, trans_type, payee=None, category=None,
            notes=None, project=None, recurring_id=None):
         """Create a single transaction."""
         with Database.get_db() as db:
-            cursor = db.execute('''
-                INSERT INTO transactions 
-                (account_id, amount, date, type, payee, category, notes, project, recurring_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (account_id, amount, date, trans_type, payee, category, notes, project, recurring_id))
-            
-            # Update account balance using existing connection
-            account.update_balance(account_id, amount, db)
+            cursor = db.execute(INSERT_TRANSACTION, (
+                account_id, amount, date, trans_type, payee, category, notes, project, recurring_id
+            ))
             db.commit()
             return cursor.lastrowid
     
+def bulk_create(rows):
+        """Insert many transactions in a single write transaction.
+        
+        Each row is a (account_id, amount, date, type, payee, category,
+        notes, project) tuple; balances are posted once per account.
+        """
+        with Database.get_db() as db:
+            db.execute('BEGIN IMMEDIATE')
+            with Database.batched_balances(db):
+                cursor = db.executemany('''
+                    INSERT INTO transactions 
+                    (account_id, amount, date, type, payee, category, notes, project)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+            db.commit()
+            return cursor.rowcount
+    
 def create_transfer(from_account_id, to_account_id, amount, date, payee=None, 
                    category=None, notes=None, project=None, recurring_id=None):
         """Create a transfer between accounts (dual transactions)."""
         with Database.get_db() as db:
-            # Get account names for payees
-            from_account = account.get_by_id(from_account_id)
-            to_account = account.get_by_id(to_account_id)
-            
-            # From account (negative)
-            db.execute('''
-                INSERT INTO transactions 
-                (account_id, amount, date, type, payee, category, notes, project, recurring_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (from_account_id, -abs(amount), date, 'transfer',
-                  to_account['name'] if to_account else 'Transfer', 
-                  category, notes, project, recurring_id))
-            
-            # To account (positive)
-            db.execute('''
-                INSERT INTO transactions 
-                (account_id, amount, date, type, payee, category, notes, project, recurring_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (to_account_id, abs(amount), date, 'transfer',
-                  from_account['name'] if from_account else 'Transfer',
-                  category, notes, project, recurring_id))
+            db.execute('BEGIN IMMEDIATE')
             
-            # Update both account balances using existing connection
-            account.update_balance(from_account_id, -abs(amount), db)
-            account.update_balance(to_account_id, abs(amount), db)
+            # Get account names for payees
+            names = dict(db.execute(
+                'SELECT id, name FROM accounts WHERE id IN (?, ?)',
+                (from_account_id, to_account_id)
+            ).fetchall())
+            
+            # Debit the source and credit the destination in one batch
+            db.executemany(INSERT_TRANSACTION, [
+                (from_account_id, -abs(amount), date, 'transfer',
+                 names.get(int(to_account_id), 'Transfer'),
+                 category, notes, project, recurring_id),
+                (to_account_id, abs(amount), date, 'transfer',
+                 names.get(int(from_account_id), 'Transfer'),
+                 category, notes, project, recurring_id),
+            ])
             db.commit()
     
 def update(transaction_id, account_id, amount, date, trans_type, payee=None,
            category=None, notes=None, project=None, transfer_account_id=None):
         """Update an existing transaction."""
         with Database.get_db() as db:
-            # Get current transaction
-            current = db.execute(
-                'SELECT account_id, amount, type FROM transactions WHERE id = ?', 
-                (transaction_id,)
-            ).fetchone()
-            
-            if not current:
-                return False
-            
-            old_amount = current['amount']
-            old_account_id = current['account_id']
-            
-            # Handle transfer logic
-            if trans_type == 'transfer' and transfer_account_id:
-                dest_account = account.get_by_id(transfer_account_id)
-                if old_amount < 0:  # This was the source transaction
-                    new_amount = -abs(amount)
-                    payee = dest_account['name'] if dest_account else 'Transfer'
-                else:  # This was the destination transaction
-                    new_amount = abs(amount)
-                    source_account = account.get_by_id(account_id)
-                    payee = source_account['name'] if source_account else 'Transfer'
-            else:
-                # Regular transaction
-                new_amount = -abs(amount) if trans_type == 'expense' else abs(amount)
-            
-            # Update transaction
-            db.execute('''
-                UPDATE transactions 
-                SET account_id = ?, amount = ?, date = ?, type = ?, payee = ?, category = ?, notes = ?, project = ?
-                WHERE id = ?
-            ''', (account_id, new_amount, date, trans_type, payee, category, notes, project, transaction_id))
-            
-            # Adjust account balances using existing connection
-            if old_account_id == account_id:
-                balance_diff = new_amount - old_amount
-                account.update_balance(old_account_id, balance_diff, db)
-            else:
-                account.update_balance(old_account_id, -old_amount, db)
-                account.update_balance(account_id, new_amount, db)
-            
+            cursor = db.execute(UPDATE_TRANSACTION, {
+                'id': transaction_id, 'account_id': account_id, 'amount': amount,
+                'date': date, 'type': trans_type, 'payee': payee, 'category': category,
+                'notes': notes, 'project': project,
+                # Only transfers re-derive direction and payee from the accounts
+                'transfer_account_id': transfer_account_id if trans_type == 'transfer' and transfer_account_id else None,
+            })
             db.commit()
-            return True
+            return cursor.rowcount > 0
     
 def delete(transaction_id):
         """Delete a transaction."""
         with Database.get_db() as db:
-            trans = db.execute(
-                'SELECT account_id, amount FROM transactions WHERE id = ?', 
-                (transaction_id,)
-            ).fetchone()
-            
-            if trans:
-                db.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-                account.update_balance(trans['account_id'], -trans['amount'], db)
-                db.commit()
-                return True
-            return False
+            cursor = db.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+            db.commit()
+            return cursor.rowcount > 0
+    
+@lru_cache(maxsize=32)
+def _drill_down_query(condition, has_start, has_end, has_types):
+    """Assemble a drill-down query for the filters present.
+    
+    The SQL text depends only on which filters are set, so each shape is
+    built once and maps to the same prepared statement on every call.
+    """
+    query = ACCOUNT_TRANSACTIONS_SELECT + ' WHERE ' + condition
+    if has_start:
+        query += ' AND t.date >= ?'
+    if has_end:
+        query += ' AND t.date <= ?'
+    if has_types:
+        query += ' AND a.type IN (SELECT value FROM json_each(?))'
+    return query + ' ORDER BY t.date DESC, t.id DESC'
+
+
+def _drill_down(condition, params, start_date, end_date, account_types):
+    """Run a drill-down query; account types are bound as one JSON array."""
+    params = params + [value for value in (start_date, end_date) if value]
+    if account_types:
+        params.append(json.dumps(list(account_types)))
     
+    query = _drill_down_query(condition, bool(start_date), bool(end_date), bool(account_types))
+    with Database.get_db() as db:
+        return db.execute(query, params).fetchall()
+
+
 def get_by_category(category, start_date=None, end_date=None, account_types=None):
         """Get transactions for a specific category with filters."""
-        with Database.get_db() as db:
-            query = '''
-                SELECT t.*, a.name as account_name
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                WHERE t.category = ?
-            '''
-            params = [category]
-            
-            if start_date and end_date:
-                query += ' AND t.date BETWEEN ? AND ?'
-                params.extend([start_date, end_date])
-            elif start_date:
-                query += ' AND t.date >= ?'
-                params.append(start_date)
-            elif end_date:
-                query += ' AND t.date <= ?'
-                params.append(end_date)
-            
-            if account_types:
-                placeholders = ",".join(["?" for _ in account_types])
-                query += f' AND a.type IN ({placeholders})'
-                params.extend(account_types)
-            
-            query += ' ORDER BY t.date DESC, t.id DESC'
-            return db.execute(query, params).fetchall()
+        return _drill_down('t.category = ?', [category], start_date, end_date, account_types)
 
 def get_income_transactions(start_date=None, end_date=None, account_types=None):
     """Get income transactions (excluding transfers) with filters."""
-    with Database.get_db() as db:
-        query = '''
-            SELECT t.*, a.name as account_name
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            WHERE t.type = 'income'
-        '''
-        params = []
-        
-        if start_date and end_date:
-            query += ' AND t.date BETWEEN ? AND ?'
-            params.extend([start_date, end_date])
-        elif start_date:
-            query += ' AND t.date >= ?'
-            params.append(start_date)
-        elif end_date:
-            query += ' AND t.date <= ?'
-            params.append(end_date)
-        
-        if account_types:
-            placeholders = ",".join(["?" for _ in account_types])
-            query += f' AND a.type IN ({placeholders})'
-            params.extend(account_types)
-        
-        query += ' ORDER BY t.date DESC, t.id DESC'
-        return db.execute(query, params).fetchall()
\ No newline at end of file
+    return _drill_down("t.type = 'income'", [], start_date, end_date, account_types)
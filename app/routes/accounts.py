@@ -1,11 +1,14 @@
 """Account routes."""
 from flask import Blueprint, request, jsonify
 from ..models import account
+from ..utils import cache
+from ..utils.responses import rows_to_dicts
 
 accounts_bp = Blueprint('accounts', __name__)
 
 
 @accounts_bp.route('/api/accounts', methods=['GET', 'POST'])
+@cache.etagged
 def accounts():
     """Handle account operations."""
     if request.method == 'POST':
@@ -18,7 +21,7 @@ def accounts():
         return jsonify({'id': account_id, 'message': 'Account created'})
     
     accounts = account.get_all()
-    return jsonify([dict(row) for row in accounts])
+    return jsonify(rows_to_dicts(accounts))
 
 
 @accounts_bp.route('/api/accounts/<int:account_id>', methods=['PUT'])
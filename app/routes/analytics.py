@@ -1,11 +1,44 @@
 """Analytics routes."""
+from itertools import cycle, islice
 from flask import Blueprint, request, jsonify
 from ..models import analytics
 from ..models import account
 from ..models import transaction
+from ..utils import cache
+from ..utils.responses import rows_to_dicts
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# 36 distinct category colors; later categories get generated hues
+CATEGORY_COLORS = (
+    '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', 
+    '#C9CBCF', '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', 
+    '#DDA0DD', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', 
+    '#82E0AA', '#F1948A', '#A9DFBF', '#F9E79F', '#AED6F1', '#F8D7DA',
+    '#D5DBDB', '#FADBD8', '#E8DAEF', '#D6EAF8', '#D1F2EB', '#FCF3CF',
+    '#EBDEF0', '#D6F9D6', '#FFE4E1', '#E0F2E7', '#FFF0F5', '#F0FFFF'
+)
+
+PAYEE_COLORS = (
+    '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', 
+    '#FF9F40', '#C9CBCF', '#FF6B6B', '#4ECDC4', '#45B7D1'
+)
+
+POSITIVE_COLOR = '#36A2EB'
+NEGATIVE_COLOR = '#FF6384'
+
+
+def _category_color(index):
+    """Return the color for the category at the given position."""
+    if index < len(CATEGORY_COLORS):
+        return CATEGORY_COLORS[index]
+    
+    # Generate additional colors using golden angle for good distribution
+    hue = (index * 137.5) % 360
+    saturation = 65 + (index % 3) * 10  # Vary saturation slightly
+    lightness = 55 + (index % 4) * 5    # Vary lightness slightly
+    return f'hsl({hue}, {saturation}%, {lightness}%)'
+
 
 @analytics_bp.route('/api/analytics/stats')
 def get_stats():
@@ -14,14 +47,10 @@ def get_stats():
     end_date = request.args.get('end_date')
     account_types = request.args.getlist('account_types')
     
-    # Get total balance
-    total_balance = account.get_total_balance(account_types if account_types else None)
-    
-    # Get income/expense stats
-    stats = analytics.get_stats(start_date, end_date, account_types)
-    stats['total_balance'] = total_balance
-    
-    return jsonify(stats)
+    return cache.cached_response(
+        ('stats', start_date, end_date, tuple(sorted(account_types))),
+        lambda: analytics.get_stats(start_date, end_date, account_types)
+    )
 
 
 @analytics_bp.route('/api/analytics/charts')
@@ -31,45 +60,39 @@ def get_chart_data():
     end_date = request.args.get('end_date')
     account_types = request.args.getlist('account_types')
     
-    def get_category_color(category_name, index):
-        """Generate consistent colors for categories based on name and index."""
-        # Expanded color palette with 36 distinct colors
-        base_colors = [
-            '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', 
-            '#C9CBCF', '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', 
-            '#DDA0DD', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9', '#F8C471', 
-            '#82E0AA', '#F1948A', '#A9DFBF', '#F9E79F', '#AED6F1', '#F8D7DA',
-            '#D5DBDB', '#FADBD8', '#E8DAEF', '#D6EAF8', '#D1F2EB', '#FCF3CF',
-            '#EBDEF0', '#D6F9D6', '#FFE4E1', '#E0F2E7', '#FFF0F5', '#F0FFFF'
-        ]
-        
-        if index < len(base_colors):
-            return base_colors[index]
-        else:
-            # Generate additional colors using golden angle for good distribution
-            hue = (index * 137.5) % 360
-            saturation = 65 + (index % 3) * 10  # Vary saturation slightly
-            lightness = 55 + (index % 4) * 5    # Vary lightness slightly
-            return f'hsl({hue}, {saturation}%, {lightness}%)'
-    
-    # Category spending
-    categories = analytics.get_category_spending(start_date, end_date, account_types)
+    return cache.cached_response(
+        ('charts', start_date, end_date, tuple(sorted(account_types))),
+        lambda: _build_chart_data(start_date, end_date, account_types)
+    )
+
+
+def _build_chart_data(start_date, end_date, account_types):
+    """Build every dashboard chart dataset for the given filters."""
+    # Category spending, monthly trend and category trends share one query
+    categories, trends, category_trends = analytics.get_chart_summary(
+        start_date, end_date, account_types
+    )
     
-    # Create consistent color mapping for all charts
+    # Create consistent color mapping for all charts, filling the pie
+    # chart's parallel arrays in the same pass
     category_color_map = {}
-    for i, category in enumerate(categories):
-        category_color_map[category['category']] = get_category_color(category['category'], i)
+    category_labels, category_totals, category_colors = [], [], []
+    for i, c in enumerate(categories):
+        color = _category_color(i)
+        category_color_map[c['category']] = color
+        category_labels.append(c['category'])
+        category_totals.append(c['total'])
+        category_colors.append(color)
     
     category_data = {
-        'labels': [c['category'] for c in categories],
+        'labels': category_labels,
         'datasets': [{
-            'data': [c['total'] for c in categories],
-            'backgroundColor': [category_color_map[c['category']] for c in categories]
+            'data': category_totals,
+            'backgroundColor': category_colors
         }]
     }
     
     # Monthly trend
-    trends = analytics.get_monthly_trend(start_date, end_date, account_types)
     trend_data = {
         'labels': [t['month'] for t in trends],
         'datasets': [
@@ -105,23 +128,25 @@ def get_chart_data():
     }
     
     # Account balances
-    accounts = account.get_all()
-    if account_types:
-        accounts = [a for a in accounts if a['type'] in account_types]
+    account_names, balances, balance_colors = [], [], []
+    for a in account.get_all():
+        if account_types and a['type'] not in account_types:
+            continue
+        balance = a['balance']
+        account_names.append(a['name'])
+        balances.append(balance)
+        balance_colors.append(POSITIVE_COLOR if balance >= 0 else NEGATIVE_COLOR)
     
     account_data = {
-        'labels': [a['name'] for a in accounts],
+        'labels': account_names,
         'datasets': [{
             'label': 'Balance',
-            'data': [a['balance'] for a in accounts],
-            'backgroundColor': ['#36A2EB' if a['balance'] >= 0 else '#FF6384' for a in accounts]
+            'data': balances,
+            'backgroundColor': balance_colors
         }]
     }
     
-    # Category trends
-    category_trends = analytics.get_category_trends(start_date, end_date, account_types)
-    
-    # Organize by category and month
+    # Category trends: organize by category and month
     category_data_by_month = {}
     months = set()
     categories_set = set()
@@ -146,9 +171,8 @@ def get_chart_data():
     remaining_categories = sorted(list(categories_set - set(all_categories)))
     all_categories.extend(remaining_categories)
     
-    # Get monthly income data for the same period
+    # Monthly income for the same period, reusing the trend rows fetched above
     monthly_income = {}
-    trends = analytics.get_monthly_trend(start_date, end_date, account_types)
     for trend in trends:
         if trend['month'] in sorted_months:
             monthly_income[trend['month']] = trend['income']
@@ -159,20 +183,16 @@ def get_chart_data():
         'monthly_income': [monthly_income.get(month, 0) for month in sorted_months]
     }
     
-    for i, category in enumerate(all_categories):
+    # Categories outside the pie chart continue its color sequence
+    for i, category in enumerate(remaining_categories, len(categories)):
+        category_color_map[category] = _category_color(i)
+    
+    for category in all_categories:
         data = []
         for month in sorted_months:
             data.append(category_data_by_month.get(category, {}).get(month, 0))
         
-        # Use consistent color - if category is in the main categories, use existing color, else generate new
-        if category in category_color_map:
-            color = category_color_map[category]
-        else:
-            # For categories not in main spending list, get color based on total index
-            main_category_count = len([c for c in categories])
-            new_index = main_category_count + remaining_categories.index(category)
-            color = get_category_color(category, new_index)
-        
+        color = category_color_map[category]
         category_trend_data['datasets'].append({
             'label': category,
             'data': data,
@@ -181,15 +201,16 @@ def get_chart_data():
             'tension': 0.4
         })
     
-    return jsonify({
+    return {
         'category': category_data,
         'trend': trend_data,
         'accounts': account_data,
         'category_trends': category_trend_data
-    })
+    }
 
 
 @analytics_bp.route('/api/analytics/category/<category>')
+@cache.etagged
 def get_category_transactions(category):
     """Get transactions for a specific category with filters."""
     start_date = request.args.get('start_date')
@@ -200,10 +221,11 @@ def get_category_transactions(category):
         category, start_date, end_date, account_types
     )
     
-    return jsonify([dict(row) for row in transactions])
+    return jsonify(rows_to_dicts(transactions))
 
 
 @analytics_bp.route('/api/analytics/income-transactions')
+@cache.etagged
 def get_income_transactions():
     """Get income transactions (excluding transfers) with filters."""
     start_date = request.args.get('start_date')
@@ -214,10 +236,11 @@ def get_income_transactions():
         start_date, end_date, account_types
     )
     
-    return jsonify([dict(row) for row in transactions])
+    return jsonify(rows_to_dicts(transactions))
 
 
 @analytics_bp.route('/api/analytics/top-payees')
+@cache.etagged
 def get_top_payees():
     """Get top payees by spending amount with filters."""
     start_date = request.args.get('start_date')
@@ -232,15 +255,13 @@ def get_top_payees():
         'datasets': [{
             'label': 'Amount Spent',
             'data': [p['total'] for p in payees],
-            'backgroundColor': [
-                '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', 
-                '#FF9F40', '#C9CBCF', '#FF6B6B', '#4ECDC4', '#45B7D1'
-            ][:len(payees)]
+            'backgroundColor': list(islice(cycle(PAYEE_COLORS), len(payees)))
         }]
     })
 
 
 @analytics_bp.route('/api/analytics/savings-investments-flow')
+@cache.etagged
 def get_savings_investments_flow():
     """Get monthly savings and investments flow data with filters."""
     start_date = request.args.get('start_date')
@@ -286,6 +307,7 @@ def get_savings_investments_flow():
 
 
 @analytics_bp.route('/api/analytics/net-worth-history')
+@cache.etagged
 def get_net_worth_history():
     """Get net worth history over all time (ignoring date filters)."""
     history = analytics.get_net_worth_history()
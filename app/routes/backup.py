@@ -1,5 +1,6 @@
 """Backup management routes."""
 from flask import Blueprint, jsonify, request, current_app, send_file
+from app.database import Database
 from app.utils.backup import BackupManager
 import os
 
@@ -11,8 +12,8 @@ def get_backup_manager():
     """Get backup manager instance with current app settings."""
     settings = getattr(current_app, '_backup_settings', {})
     return BackupManager(
-        db_path=current_app.config['DATABASE'],
-        backup_dir=settings.get('directory', 'backups'),
+        db_path=current_app.config['DATABASE_ABS'],
+        backup_dir=current_app.config['BACKUP_DIR'],
         settings=settings
     )
 
@@ -61,7 +62,9 @@ def restore_backup():
             return jsonify({'error': 'Backup filename is required'}), 400
         
         backup_manager = get_backup_manager()
-        backup_manager.restore_backup(data['filename'])
+        with Database.replacing():
+            backup_manager.restore_backup(data['filename'])
+            Database.migrate()
         
         return jsonify({
             'success': True,
@@ -1,6 +1,7 @@
 """Payee routes."""
 from flask import Blueprint, request, jsonify
 from ..models import payee
+from ..utils.responses import rows_to_dicts
 
 payees_bp = Blueprint('payees', __name__)
 
@@ -18,4 +19,4 @@ def payees():
             return jsonify({'message': 'Payee already exists'})
     
     payees = payee.get_all()
-    return jsonify([dict(row) for row in payees])
\ No newline at end of file
+    return jsonify(rows_to_dicts(payees))
\ No newline at end of file
@@ -1,6 +1,7 @@
 """Project routes."""
 from flask import Blueprint, request, jsonify
 from ..models import project
+from ..utils.responses import rows_to_dicts
 
 projects_bp = Blueprint('projects', __name__)
 
@@ -22,7 +23,7 @@ def projects():
     
     else:  # GET
         projects = project.get_all_with_stats()
-        return jsonify([dict(row) for row in projects])
+        return jsonify(rows_to_dicts(projects))
 
 
 @projects_bp.route('/api/projects/<int:project_id>', methods=['GET', 'PUT', 'DELETE'])
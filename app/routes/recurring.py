@@ -1,6 +1,8 @@
 """Recurring transaction routes."""
+import sqlite3
 from flask import Blueprint, jsonify
 from ..models import recurring
+from ..utils.responses import rows_to_dicts
 
 recurring_bp = Blueprint('recurring', __name__)
 
@@ -9,7 +11,7 @@ recurring_bp = Blueprint('recurring', __name__)
 def get_recurring():
     """Get all recurring transactions."""
     recurring_transactions = recurring.get_all_active()
-    return jsonify([dict(row) for row in recurring_transactions])
+    return jsonify(rows_to_dicts(recurring_transactions))
 
 
 @recurring_bp.route('/api/recurring/<int:recurring_id>', methods=['DELETE'])
@@ -27,5 +29,8 @@ def process_recurring():
         
         message = f'Processed {processed} recurring transaction(s)' if processed > 0 else 'No recurring transactions are due'
         return jsonify({'message': message, 'processed': processed})
+    except sqlite3.IntegrityError:
+        # A schedule whose account no longer exists; nothing was posted
+        return jsonify({'error': 'Unknown account'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,10 +1,54 @@
 """Transaction routes."""
+import math
+import sqlite3
+from datetime import datetime
 from flask import Blueprint, request, jsonify
+from ..models import account
 from ..models import transaction
 from ..models import recurring
+from ..utils.responses import rows_to_dicts
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Transaction types the bulk endpoint accepts
+BULK_TYPES = frozenset(['income', 'expense'])
+
+# Foreign keys are enforced, so the only integrity failure a transaction
+# write can hit is a reference to an account that doesn't exist
+UNKNOWN_ACCOUNT = {'error': 'Unknown account'}
+
+
+def _parse_id(value):
+    """Return value as an integer id, or None if it isn't one.
+    
+    Accepts JSON integers and strings of digits; booleans and floats are
+    rejected rather than truncated.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _account_id_error(data):
+    """Return an error body if an account id in a posted transaction isn't an integer."""
+    for field in ('account_id', 'transfer_account_id'):
+        if data.get(field) and _parse_id(data[field]) is None:
+            return {'error': f'{field} must be an integer'}
+    return None
+
+
+def _is_iso_date(value):
+    """Whether value is a YYYY-MM-DD date string."""
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return False
+    return True
+
 
 @transactions_bp.route('/api/transactions', methods=['GET', 'POST'])
 def transactions():
@@ -22,6 +66,10 @@ def transactions():
             if missing_fields:
                 return jsonify({'error': f'Missing required fields: {", ".join(missing_fields)}'}), 400
             
+            error = _account_id_error(data)
+            if error:
+                return jsonify(error), 400
+            
             # Handle recurring transaction creation
             recurring_id = None
             if data.get('is_recurring'):
@@ -56,22 +104,109 @@ def transactions():
             
             return jsonify({'message': 'Transaction added'})
             
+        except sqlite3.IntegrityError:
+            return jsonify(UNKNOWN_ACCOUNT), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     try:
-        # GET request with filters
+        # GET request with filters, continuing after an optional page cursor
+        cursor = None
+        cursor_date, cursor_id = request.args.get('cursor_date'), request.args.get('cursor_id')
+        if cursor_date or cursor_id:
+            cursor_id = _parse_id(cursor_id)
+            if not cursor_date or cursor_id is None:
+                return jsonify({'error': 'cursor_date and an integer cursor_id must be given together'}), 400
+            cursor = (cursor_date, cursor_id)
+        
+        account_id = request.args.get('account_id')
+        if account_id:
+            account_id = _parse_id(account_id)
+            if account_id is None:
+                return jsonify({'error': 'account_id must be an integer'}), 400
+        
+        # SQLite reads a negative LIMIT as no limit at all
+        limit = _parse_id(request.args.get('limit', '100'))
+        if not limit:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
         transactions = transaction.get_filtered(
-            account_id=request.args.get('account_id'),
+            account_id=account_id,
             category=request.args.get('category'),
             trans_type=request.args.get('type'),
             date_from=request.args.get('date_from'),
             date_to=request.args.get('date_to'),
             search=request.args.get('search'),
-            limit=int(request.args.get('limit', 100))
+            limit=limit,
+            cursor=cursor
         )
         
-        return jsonify([dict(row) for row in transactions])
+        response = jsonify(rows_to_dicts(transactions))
+        # A full page may have more after it; tell the client where to resume
+        if transactions and len(transactions) == limit:
+            last = transactions[-1]
+            response.headers['X-Next-Cursor'] = f"cursor_date={last['date']}&cursor_id={last['id']}"
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@transactions_bp.route('/api/transactions/bulk', methods=['POST'])
+def bulk_create_transactions():
+    """Add many transactions at once."""
+    try:
+        data = request.json
+        
+        if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+            return jsonify({'error': 'Expected a JSON object with a list of rows'}), 400
+        
+        # Validate every row before writing any of them
+        required_fields = ['account_id', 'amount', 'date', 'type']
+        rows = []
+        for i, row in enumerate(data['rows']):
+            if not isinstance(row, dict):
+                return jsonify({'error': f'Row {i}: expected a JSON object'}), 400
+            
+            missing_fields = [field for field in required_fields if not row.get(field)]
+            if missing_fields:
+                return jsonify({'error': f'Row {i}: missing required fields: {", ".join(missing_fields)}'}), 400
+            
+            # Transfers need both legs, which only the single-transaction route creates
+            if row['type'] not in BULK_TYPES:
+                return jsonify({'error': f'Row {i}: type must be income or expense'}), 400
+            
+            try:
+                amount = float(row['amount'])
+            except (TypeError, ValueError):
+                amount = None
+            if amount is None or not math.isfinite(amount):
+                return jsonify({'error': f'Row {i}: amount must be a number'}), 400
+            
+            account_id = _parse_id(row['account_id'])
+            if account_id is None:
+                return jsonify({'error': f'Row {i}: account_id must be an integer'}), 400
+            
+            if not _is_iso_date(row['date']):
+                return jsonify({'error': f'Row {i}: date must be YYYY-MM-DD'}), 400
+            
+            amount = -abs(amount) if row['type'] == 'expense' else abs(amount)
+            rows.append((
+                account_id, amount, row['date'], row['type'],
+                row.get('payee'), row.get('category'), row.get('notes'), row.get('project')
+            ))
+        
+        # One lookup for every referenced account, so an unknown id is a 400
+        # naming its row rather than a foreign key failure part way through
+        existing = account.get_existing_ids({r[0] for r in rows})
+        for i, r in enumerate(rows):
+            if r[0] not in existing:
+                return jsonify({'error': f'Row {i}: unknown account {r[0]}'}), 400
+        
+        added = transaction.bulk_create(rows)
+        return jsonify({'message': f'Added {added} transactions', 'added': added})
+        
+    except sqlite3.IntegrityError:
+        # An account deleted between the lookup and the insert
+        return jsonify(UNKNOWN_ACCOUNT), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -91,6 +226,10 @@ def update_transaction(transaction_id):
         if missing_fields:
             return jsonify({'error': f'Missing required fields: {", ".join(missing_fields)}'}), 400
         
+        error = _account_id_error(data)
+        if error:
+            return jsonify(error), 400
+        
         success = transaction.update(
             transaction_id, data['account_id'], data['amount'], 
             data['date'], data['type'], data.get('payee'),
@@ -103,6 +242,8 @@ def update_transaction(transaction_id):
         else:
             return jsonify({'error': 'Transaction not found'}), 404
             
+    except sqlite3.IntegrityError:
+        return jsonify(UNKNOWN_ACCOUNT), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,6 +1,5 @@
 """Database backup utility module."""
 import os
-import shutil
 import sqlite3
 import threading
 import time
@@ -9,6 +8,33 @@ from pathlib import Path
 import json
 
 
+def copy_database(source_path, dest_path):
+    """Overwrite the database at dest_path with the contents of source_path.
+    
+    Goes through SQLite's backup API rather than copying files, so a live
+    WAL-mode destination is rewritten in place: connections still open on
+    it see the new contents, and no stale -wal/-shm files are left next to
+    a swapped-in file.
+    """
+    source = sqlite3.connect(source_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        # A WAL database can't change page size, so leave WAL for the copy
+        resize = (
+            dest.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            and dest.execute('PRAGMA page_size').fetchone()[0]
+            != source.execute('PRAGMA page_size').fetchone()[0]
+        )
+        if resize:
+            dest.execute('PRAGMA journal_mode = DELETE')
+        source.backup(dest)
+        if resize:
+            dest.execute('PRAGMA journal_mode = WAL')
+    finally:
+        dest.close()
+        source.close()
+
+
 class BackupManager:
     """Manages periodic database backups."""
     
@@ -131,8 +157,8 @@ class BackupManager:
         print(f"📦 Created backup of current database: {current_backup}")
         
         try:
-            # Copy backup file to database location
-            shutil.copy2(str(backup_path), self.db_path)
+            # Rewrite the live database in place rather than replacing its file
+            copy_database(str(backup_path), self.db_path)
             print(f"✅ Database restored from: {backup_filename}")
             
         except Exception as e:
@@ -0,0 +1,109 @@
+"""In-process cache for read-heavy analytics responses."""
+import threading
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+
+# Methods that never modify data; any other request invalidates the cache
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+# Least recently used entries are evicted beyond this many
+MAX_ENTRIES = 128
+
+_lock = threading.Lock()
+_version = 0
+_entries = OrderedDict()
+
+# Distinguishes this process's versions from those of earlier runs
+_token = uuid.uuid4().hex[:12]
+
+
+def get_version():
+    """Return the current write version."""
+    return _version
+
+
+def get_etag():
+    """Return an entity tag identifying the current write version."""
+    return f'{_token}-{_version}'
+
+
+def get_or_compute(key, compute):
+    """Return the cached value for key, computing and storing it on a miss.
+
+    A value computed while a write landed is returned but not stored, so
+    the cache never holds data older than the current version.
+    """
+    with _lock:
+        version = _version
+        if key in _entries:
+            _entries.move_to_end(key)
+            return _entries[key]
+
+    value = compute()
+
+    with _lock:
+        if _version == version:
+            _entries[key] = value
+            if len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return value
+
+
+def conditional_response(build):
+    """Return build()'s response, or 304 if the client's copy is current.
+    
+    Every response carries the write-version ETag and asks the browser to
+    revalidate, so repeat loads between writes cost no query or body.
+    """
+    etag = get_etag()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def etagged(view):
+    """Decorate a view so its reads are served through conditional_response."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(*args, **kwargs)
+        return conditional_response(lambda: make_response(view(*args, **kwargs)))
+    return wrapper
+
+
+def cached_response(key, compute):
+    """Return compute()'s payload as JSON, or 304 if the client's copy is current.
+    
+    The serialized body is what gets cached, so a hit skips JSON encoding.
+    """
+    def build():
+        body = get_or_compute(key, lambda: jsonify(compute()).get_data())
+        return current_app.response_class(body, mimetype='application/json')
+    
+    return conditional_response(build)
+
+
+def invalidate():
+    """Bump the write version and drop every cached value."""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
+
+
+def _invalidate_on_write(response):
+    """Invalidate after any request that may have written to the database."""
+    if request.method not in SAFE_METHODS:
+        invalidate()
+    return response
+
+
+def init_app(app):
+    """Register write invalidation on the Flask app."""
+    app.after_request(_invalidate_on_write)
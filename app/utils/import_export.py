@@ -2,20 +2,65 @@
 import os
 import io
 import csv
+import operator
 import sqlite3
+import tempfile
+from collections import namedtuple
 from datetime import datetime
-from flask import current_app, send_file, request, jsonify
+from flask import Response, current_app, send_file, request, jsonify, stream_with_context
 from ..database import Database
-from ..models import account
-from ..models import payee
-from ..models import category
+from .backup import copy_database
+
+# Tables an imported database must contain to be accepted
+REQUIRED_TABLES = {'accounts', 'transactions', 'recurring_transactions'}
+
+# A validated CSV import row; index is its position among the accepted rows
+ParsedRow = namedtuple('ParsedRow', 'index account date payee notes category amount')
+
+# Account ids by name for CSV import; on duplicate names the last wins
+ACCOUNT_IDS_SQL = 'SELECT name, id FROM accounts ORDER BY type, name'
+
+# CSV export columns, selected in the same order they are written; an
+# import reads the same headings
+CSV_EXPORT_COLUMNS = ['Account', 'Date', 'Payee', 'Notes', 'Category', 'Amount']
+CSV_EXPORT_SQL = '''
+    SELECT 
+        a.name as Account,
+        t.date as Date,
+        COALESCE(t.payee, '') as Payee,
+        COALESCE(t.notes, '') as Notes,
+        COALESCE(t.category, '') as Category,
+        t.amount as Amount
+    FROM transactions t
+    JOIN accounts a ON t.account_id = a.id
+    ORDER BY t.date DESC, t.id DESC
+'''
+
+# Rows formatted per streamed chunk of the CSV export
+CSV_CHUNK_ROWS = 500
+
+
+class _SnapshotFile(io.FileIO):
+    """Temporary export file that deletes itself once the response closes it."""
+    
+    def close(self):
+        if not self.closed:
+            super().close()
+            os.remove(self.name)
 
 
 def get_database_info():
-        """Get database file information."""
+        """Get database size from its page count.
+        
+        page_count already includes pages still waiting in the WAL, and the
+        -wal file keeps its size after a checkpoint, so it isn't added.
+        """
         db_path = current_app.config['DATABASE']
         if os.path.exists(db_path):
-            size = os.path.getsize(db_path)
+            with Database.get_db() as db:
+                page_count = db.execute('PRAGMA page_count').fetchone()[0]
+                page_size = db.execute('PRAGMA page_size').fetchone()[0]
+            size = page_count * page_size
             if size < 1024:
                 size_str = f"{size} bytes"
             elif size < 1024 * 1024:
@@ -28,12 +73,29 @@ def get_database_info():
         return {'size': size_str}
     
 def export_database():
-        """Export the database file."""
-        db_path = current_app.config['DATABASE']
+        """Export a consistent snapshot of the database.
+        
+        The live file may have pages still in the WAL or a write in flight,
+        so copy it with SQLite's online backup API into a temporary file and
+        stream that; the file is removed when the server closes the response.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f'money_tracker_backup_{timestamp}.db'
         
-        return send_file(db_path, as_attachment=True, download_name=filename)
+        fd, snapshot_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            snapshot = sqlite3.connect(snapshot_path)
+            try:
+                with Database.get_db() as db:
+                    db.backup(snapshot)
+            finally:
+                snapshot.close()
+        except Exception:
+            os.remove(snapshot_path)
+            raise
+        
+        return send_file(_SnapshotFile(snapshot_path), as_attachment=True, download_name=filename)
     
 def import_database(file):
         """Import a database file."""
@@ -43,105 +105,102 @@ def import_database(file):
         if not file.filename.endswith('.db'):
             return {'error': 'File must be a .db file'}, 400
         
+        db_path = current_app.config['DATABASE']
+        incoming_path = db_path + '.incoming'
+        
         try:
-            db_path = current_app.config['DATABASE']
+            # Validate the upload beside the live database before touching it
+            file.save(incoming_path)
+            error = _validate_database(incoming_path)
+            if error:
+                os.remove(incoming_path)
+                return {'error': f'Invalid database file: {error}'}, 400
             
-            # Create backup of current database
-            if os.path.exists(db_path):
-                backup_name = f"money_tracker_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                os.rename(db_path, backup_name)
-                print(f"Current database backed up as: {backup_name}")
-            
-            # Save the uploaded file as the new database
-            file.save(db_path)
-            
-            # Verify the database is valid
-            test_db = sqlite3.connect(db_path)
-            test_db.execute('SELECT name FROM sqlite_master WHERE type="table"')
-            test_db.close()
+            with Database.replacing():
+                # Create backup of current database
+                if os.path.exists(db_path):
+                    backup_name = f"money_tracker_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+                    copy_database(db_path, backup_name)
+                    print(f"Current database backed up as: {backup_name}")
+                
+                # Rewrite the live file in place; swapping files would strand its -wal
+                copy_database(incoming_path, db_path)
+                os.remove(incoming_path)
+                
+                # Bring older databases up to the current schema (indexes, triggers)
+                Database.migrate()
             
             return {'message': 'Database imported successfully'}, 200
             
         except Exception as e:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
             return {'error': f'Failed to import database: {str(e)}'}, 500
     
-def export_csv():
-        """Export transactions to CSV format."""
-        with Database.get_db() as db:
-            transactions = db.execute('''
-                SELECT 
-                    a.name as Account,
-                    t.date as Date,
-                    COALESCE(t.payee, '') as Payee,
-                    COALESCE(t.notes, '') as Notes,
-                    COALESCE(t.category, '') as Category,
-                    t.amount as Amount
-                FROM transactions t
-                JOIN accounts a ON t.account_id = a.id
-                ORDER BY t.date DESC, t.id DESC
-            ''').fetchall()
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Account', 'Date', 'Payee', 'Notes', 'Category', 'Amount'])
-        
-        # Write data
-        for row in transactions:
-            writer.writerow([row['Account'], row['Date'], row['Payee'], 
-                           row['Notes'], row['Category'], row['Amount']])
+def _validate_database(path):
+        """Return why the SQLite file at path can't be imported, or None if it can."""
+        try:
+            test_db = sqlite3.connect(path)
+            try:
+                result = test_db.execute('PRAGMA quick_check(1)').fetchone()[0]
+                if result != 'ok':
+                    return result
+                tables = {row[0] for row in test_db.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )}
+            finally:
+                test_db.close()
+        except sqlite3.DatabaseError as e:
+            return str(e)
         
-        # Convert to bytes
-        csv_data = output.getvalue().encode('utf-8')
-        output.close()
+        missing = REQUIRED_TABLES - tables
+        if missing:
+            return f"missing tables: {', '.join(sorted(missing))}"
+        return None
+    
+def _csv_chunks(cursor):
+    """Yield the CSV export in chunks: the header, then CSV_CHUNK_ROWS rows at a time.
+    
+    Each chunk is formatted by one writerows call, so the per-row loop runs
+    in C and the response is written in a few large pieces.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_EXPORT_COLUMNS)
+    
+    for rows in iter(lambda: cursor.fetchmany(CSV_CHUNK_ROWS), []):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # An export with no transactions is just the header
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_csv():
+        """Export transactions to CSV, streaming rows as SQLite produces them."""
+        def generate():
+            with Database.get_db() as db:
+                yield from _csv_chunks(db.execute(CSV_EXPORT_SQL))
         
         # Return as file download
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f'money_tracker_transactions_{timestamp}.csv'
         
-        return send_file(
-            io.BytesIO(csv_data),
+        # The request context (and its connection) stays open until the stream ends
+        return Response(
+            stream_with_context(generate()),
             mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
 
 
 def generate_csv_content():
     """Generate CSV content as string (for native file dialog)."""
     with Database.get_db() as db:
-        transactions = db.execute('''
-            SELECT 
-                a.name as Account,
-                t.date as Date,
-                COALESCE(t.payee, '') as Payee,
-                COALESCE(t.notes, '') as Notes,
-                COALESCE(t.category, '') as Category,
-                t.amount as Amount
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            ORDER BY t.date DESC, t.id DESC
-        ''').fetchall()
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Account', 'Date', 'Payee', 'Notes', 'Category', 'Amount'])
-    
-    # Write data
-    for row in transactions:
-        writer.writerow([row['Account'], row['Date'], row['Payee'], 
-                       row['Notes'], row['Category'], row['Amount']])
-    
-    # Return as string
-    csv_content = output.getvalue()
-    output.close()
-    
-    return csv_content
+        return ''.join(_csv_chunks(db.execute(CSV_EXPORT_SQL)))
     
 def import_csv(file):
         """Import transactions from CSV format."""
@@ -152,76 +211,74 @@ def import_csv(file):
             return {'error': 'File must be a .csv file'}, 400
         
         try:
-            # Read CSV content
-            csv_content = file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(csv_content))
+            # Decode the upload as it is read instead of holding a copy of it
+            csv_file = io.TextIOWrapper(file.stream, encoding='utf-8', newline='')
             
-            imported_count = 0
             skipped_count = 0
             
-            # Get existing accounts
-            accounts = {row['name']: row['id'] for row in account.get_all()}
-            
-            # Track payees and categories for bulk insert
+            # Track accounts, payees and categories for bulk insert
+            account_names = {}
             payees_to_add = set()
             categories_to_add = set()
             
-            # First pass: collect all rows and detect transfers
-            all_rows = list(csv_reader)
-            transfer_pairs = _detect_transfers(all_rows)
-            detected_transfers = _identify_transfers(transfer_pairs)
+            # Parse each row once, skipping empty or invalid ones
+            # Each row's type starts from its sign; transfer legs are marked below
+            reader = csv.reader(csv_file)
+            get_fields, width = _field_getter(next(reader, []))
+            parsed_rows = []
+            trans_types = []
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                parsed = _parse_row(len(parsed_rows), get_fields(row))
+                if parsed is None:
+                    skipped_count += 1
+                    continue
+                
+                parsed_rows.append(parsed)
+                trans_types.append('income' if parsed.amount > 0 else 'expense')
+                if parsed.payee:
+                    payees_to_add.add(parsed.payee)
+                if parsed.category:
+                    categories_to_add.add(parsed.category)
+                # Accounts missing from the database are created below
+                account_names.setdefault(parsed.account, None)
+            imported_count = len(parsed_rows)
+            
+            transfer_pairs = _detect_transfers(parsed_rows)
+            _mark_transfers(transfer_pairs, trans_types)
             
-            # Second pass: import transactions
+            # Write everything in one transaction, posting balances per account
             with Database.get_db() as db:
-                for i, row in enumerate(all_rows):
-                    try:
-                        account_name = row.get('Account', '').strip()
-                        date = row.get('Date', '').strip()
-                        payee = row.get('Payee', '').strip() or None
-                        notes = row.get('Notes', '').strip() or None
-                        category = row.get('Category', '').strip() or None
-                        amount = float(row.get('Amount', 0))
-                        
-                        # Skip empty rows
-                        if not account_name or not date or amount == 0:
-                            skipped_count += 1
-                            continue
-                        
-                        # Collect payees and categories
-                        if payee:
-                            payees_to_add.add(payee)
-                        if category:
-                            categories_to_add.add(category)
-                        
-                        # Find or create account
-                        if account_name not in accounts:
-                            account_id = account.create(account_name, 'checking', 0)
-                            accounts[account_name] = account_id
-                        else:
-                            account_id = accounts[account_name]
-                        
-                        # Determine transaction type
-                        trans_type = 'transfer' if i in detected_transfers else ('income' if amount > 0 else 'expense')
-                        
-                        # Insert transaction
-                        db.execute('''
-                            INSERT INTO transactions 
-                            (account_id, amount, date, type, payee, category, notes)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (account_id, amount, date, trans_type, payee, category, notes))
-                        
-                        # Update account balance
-                        account.update_balance(account_id, amount)
-                        
-                        imported_count += 1
-                        
-                    except (ValueError, KeyError):
-                        skipped_count += 1
-                        continue
+                db.execute('BEGIN IMMEDIATE')
+                
+                # Look accounts up under the write lock so a concurrent
+                # import can't create the same account twice
+                accounts = dict(db.execute(ACCOUNT_IDS_SQL).fetchall())
+                new_accounts = [name for name in account_names if name not in accounts]
+                if new_accounts:
+                    accounts.update(_create_accounts(db, new_accounts))
+                
+                with Database.batched_balances(db):
+                    db.executemany('''
+                        INSERT INTO transactions 
+                        (account_id, amount, date, type, payee, category, notes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', _transaction_params(parsed_rows, trans_types, accounts))
                 
-                # Bulk insert payees and categories
-                payee.bulk_create(payees_to_add)
-                category.bulk_create(categories_to_add)
+                # Only names not already stored are written
+                payees_to_add -= {row[0] for row in db.execute('SELECT name FROM payees')}
+                categories_to_add -= {row[0] for row in db.execute('SELECT name FROM categories')}
+                db.executemany(
+                    'INSERT INTO payees (name) VALUES (?)',
+                    [(name,) for name in payees_to_add]
+                )
+                db.executemany(
+                    'INSERT INTO categories (name) VALUES (?)',
+                    [(name,) for name in categories_to_add]
+                )
                 
                 db.commit()
             
@@ -238,42 +295,100 @@ def import_csv(file):
         except Exception as e:
             return {'error': f'Failed to import CSV: {str(e)}'}, 500
     
-def _detect_transfers(all_rows):
-        """Detect potential transfer pairs in CSV data."""
+def _create_accounts(db, names):
+        """Create checking accounts for names and return their (name, id) pairs."""
+        values = ', '.join(["(?, 'checking', 0)"] * len(names))
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            return db.execute(
+                f'INSERT INTO accounts (name, type, balance) VALUES {values} RETURNING name, id', names
+            ).fetchall()
+        
+        # No RETURNING before SQLite 3.35: read the new ids back
+        db.execute(f'INSERT INTO accounts (name, type, balance) VALUES {values}', names)
+        placeholders = ', '.join('?' * len(names))
+        return db.execute(
+            f'SELECT name, MAX(id) FROM accounts WHERE name IN ({placeholders}) GROUP BY name', names
+        ).fetchall()
+    
+def _transaction_params(parsed_rows, trans_types, accounts):
+        """Yield each parsed row's transaction insert parameters as they are bound."""
+        for parsed, trans_type in zip(parsed_rows, trans_types):
+            yield (accounts[parsed.account], parsed.amount, parsed.date, trans_type,
+                   parsed.payee or None, parsed.category or None, parsed.notes or None)
+    
+def _field_getter(header):
+        """Return a getter for a row's import fields, and the row width it needs.
+        
+        The getter pulls the CSV_EXPORT_COLUMNS fields out of a csv.reader row
+        as one tuple. Columns missing from the header read a blank slot just
+        past the header, so rows must be padded to the returned width.
+        """
+        # On duplicate headings the last column wins, as with csv.DictReader
+        positions = {name: i for i, name in enumerate(header)}
+        blank = len(header)
+        indices = [positions.get(name, blank) for name in CSV_EXPORT_COLUMNS]
+        return operator.itemgetter(*indices), max(indices) + 1
+    
+def _parse_row(index, fields):
+        """Return a row's (account, date, payee, notes, category, amount) as a ParsedRow.
+        
+        Returns None for rows missing an account or date, or whose amount is
+        zero or not a number. Short rows are padded with blank fields before
+        they get here, so missing trailing fields are not errors.
+        """
+        account_name, date, payee, notes, category, amount = fields
+        account_name = account_name.strip()
+        date = date.strip()
+        if not account_name or not date:
+            return None
+        
+        try:
+            amount = float(amount or 0)
+        except ValueError:
+            return None
+        if amount == 0:
+            return None
+        
+        return ParsedRow(index, account_name, date, payee.strip(), notes.strip(), category.strip(), amount)
+    
+def _detect_transfers(parsed_rows):
+        """Group parsed rows into potential transfer buckets by date and amount.
+        
+        Buckets are keyed by (date, whole cents), so legs match on the
+        amount as written to the cent rather than on exact float equality.
+        """
         transfer_pairs = {}
-        for i, row in enumerate(all_rows):
-            try:
-                account_name = row.get('Account', '').strip()
-                date = row.get('Date', '').strip()
-                payee = row.get('Payee', '').strip()
-                amount = float(row.get('Amount', 0))
-                
-                if not account_name or not date or amount == 0:
-                    continue
-                
-                key = f"{date}_{abs(amount)}"
-                if key not in transfer_pairs:
-                    transfer_pairs[key] = []
-                transfer_pairs[key].append((i, row, account_name, payee, amount))
-            except:
-                continue
+        for parsed in parsed_rows:
+            key = (parsed.date, round(abs(parsed.amount) * 100))
+            if key not in transfer_pairs:
+                transfer_pairs[key] = []
+            transfer_pairs[key].append(parsed)
         
         return transfer_pairs
     
-def _identify_transfers(transfer_pairs):
-        """Identify which transactions are transfers based on patterns."""
-        detected_transfers = set()
+def _mark_transfers(transfer_pairs, trans_types):
+        """Set trans_types to 'transfer' for the rows that are transfer legs.
         
-        for key, candidates in transfer_pairs.items():
-            if len(candidates) >= 2:
-                for i, (idx1, row1, acc1, payee1, amt1) in enumerate(candidates):
-                    for idx2, row2, acc2, payee2, amt2 in candidates[i+1:]:
-                        # Check if amounts are opposite and payees match account names
-                        if (amt1 == -amt2 and 
-                            ((payee1 == acc2 and payee2 == acc1) or 
-                             (payee1 == acc2 and not payee2) or 
-                             (payee2 == acc1 and not payee1))):
-                            detected_transfers.add(idx1)
-                            detected_transfers.add(idx2)
-        
-        return detected_transfers
\ No newline at end of file
+        Within a date/amount bucket a row is a transfer leg when an
+        opposite-signed row exists whose account is this row's payee and
+        whose payee is this row's account (or blank), or, for a row with
+        no payee, whose payee is this row's account. Each bucket is indexed
+        once, so matching is linear rather than pairwise.
+        """
+        for candidates in transfer_pairs.values():
+            if len(candidates) < 2:
+                continue
+            
+            # (is_positive, account, payee) and (is_positive, payee) of every row
+            accounts_payees = set()
+            payees = set()
+            for row in candidates:
+                accounts_payees.add((row.amount > 0, row.account, row.payee))
+                payees.add((row.amount > 0, row.payee))
+            
+            for row in candidates:
+                opposite = row.amount < 0
+                if ((opposite, row.payee, row.account) in accounts_payees or
+                        (opposite, row.payee, '') in accounts_payees or
+                        (not row.payee and (opposite, row.account) in payees)):
+                    trans_types[row.index] = 'transfer'
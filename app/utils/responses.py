@@ -0,0 +1,55 @@
+"""JSON response helpers for the hot read endpoints."""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson, so plain jsonify is fast too.
+    
+    Output matches Flask's own provider: keys are sorted per sort_keys (or
+    the sort_keys argument), and dates and any type orjson can't encode go
+    through default (Flask's conversions unless a default is passed), so
+    dates stay HTTP dates rather than orjson's ISO strings.
+    """
+    
+    def _dumps(self, obj, sort_keys=None, default=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default or self.default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj, kwargs.get('sort_keys'), kwargs.get('default')).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps(obj), mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Encode every jsonify response with orjson when it is installed."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+
+def rows_to_dicts(rows):
+    """Convert sqlite3.Row results to dicts, reading the column names once.
+    
+    A cursor may be passed instead of fetched rows; its description names
+    the columns and rows are converted as they are read.
+    """
+    description = getattr(rows, 'description', None)
+    if description is not None:
+        columns = [column[0] for column in description]
+    elif not rows:
+        return []
+    else:
+        columns = rows[0].keys()
+    return [dict(zip(columns, row)) for row in rows]
@@ -4,6 +4,7 @@ Main application file using modular structure
 """
 from flask import Flask, render_template
 import os
+import sys
 import json
 import argparse
 import threading
@@ -23,6 +24,74 @@ from app.routes.data import data_bp
 from app.routes.settings import settings_bp
 from app.routes.backup import backup_bp
 from app.utils.backup import BackupManager
+from app.utils import cache
+from app.utils import responses
+
+RULE = "=" * 50
+
+# Banners are joined once and written in a single call
+STARTUP_BANNER = "\n".join([
+    "",
+    RULE,
+    "💰 Money Tracker Flask Server (Refactored)",
+    RULE,
+    "",
+    "📊 Features:",
+    "  • Modular architecture",
+    "  • Real SQLite database (money_tracker.db)",
+    "  • Recurring transactions",
+    "  • Multiple account support",
+    "  • Analytics and charts",
+    "  • Data export functionality",
+    "  • Automatic database backups",
+    "",
+    "💡 Tips:",
+    "  • Data persists between sessions",
+    "  • Access from any device on your network",
+    "  • Database file: money_tracker.db",
+    "  • Backups stored in: backups/ directory",
+    "",
+])
+
+HEADLESS_BANNER = "\n".join([
+    "",
+    RULE,
+    "💰 Money Tracker - Headless Mode",
+    RULE,
+    "",
+    "✅ Server running at: http://localhost:{port}",
+    "🔗 API available at: http://localhost:{port}/api/",
+    "",
+    "📋 Available endpoints:",
+    "  • GET  /api/accounts",
+    "  • POST /api/accounts",
+    "  • GET  /api/transactions",
+    "  • POST /api/transactions",
+    "  • GET  /api/recurring",
+    "  • GET  /api/analytics/stats",
+    "  • GET  /api/analytics/charts",
+    "  • GET  /api/export",
+    "",
+    "💡 Access the web interface from any browser",
+    "🛑 Press Ctrl+C to stop the server",
+    RULE,
+    "",
+    "",
+])
+
+BLUEPRINTS = (
+    accounts_bp,
+    transactions_bp,
+    recurring_bp,
+    payees_bp,
+    categories_bp,
+    projects_bp,
+    analytics_bp,
+    ai_query_bp,
+    data_bp,
+    settings_bp,
+    backup_bp,
+)
 
 
 def show_error_dialog(title, message):
@@ -82,9 +151,13 @@ def load_settings():
             print("Warning: Could not load settings.json, using defaults")
             return default_settings
     else:
-        # Create default settings file
-        with open(settings_file, 'w') as f:
-            json.dump(default_settings, f, indent=4)
+        # Create default settings file; if the directory is read-only just
+        # run with the in-memory defaults
+        try:
+            with open(settings_file, 'w') as f:
+                json.dump(default_settings, f, separators=(',', ':'))
+        except OSError as e:
+            print(f"Warning: Could not write settings.json ({e}), using defaults")
         return default_settings
 
 def create_app():
@@ -96,18 +169,21 @@ def create_app():
     # Store backup settings in app context
     app._backup_settings = settings.get('backup', {})
     
-    # Register blueprints
-    app.register_blueprint(accounts_bp)
-    app.register_blueprint(transactions_bp)
-    app.register_blueprint(recurring_bp)
-    app.register_blueprint(payees_bp)
-    app.register_blueprint(categories_bp)
-    app.register_blueprint(projects_bp)
-    app.register_blueprint(analytics_bp)
-    app.register_blueprint(ai_query_bp)
-    app.register_blueprint(data_bp)
-    app.register_blueprint(settings_bp)
-    app.register_blueprint(backup_bp)
+    # Resolve paths once; backups live relative to the database location
+    app.config['DATABASE_ABS'] = os.path.abspath(settings['database_path'])
+    app.config['BACKUP_DIR'] = os.path.join(
+        os.path.dirname(app.config['DATABASE_ABS']),
+        app._backup_settings.get('directory', 'backups')
+    )
+    
+    Database.init_app(app)
+    cache.init_app(app)
+    responses.init_app(app)
+    
+    # Register blueprints before any app-level route so the URL map is
+    # only rebuilt once, lazily, when the first request binds it
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
     
     @app.route('/')
     def index():
@@ -122,14 +198,9 @@ def start_backup_system(app):
     with app.app_context():
         backup_settings = getattr(app, '_backup_settings', {})
         if backup_settings.get('enabled', True):
-            # Determine backup directory - should be relative to database location
-            db_path = app.config['DATABASE']
-            db_dir = os.path.dirname(os.path.abspath(db_path))
-            backup_dir = os.path.join(db_dir, backup_settings.get('directory', 'backups'))
-            
             backup_manager = BackupManager(
-                db_path=db_path,
-                backup_dir=backup_dir,
+                db_path=app.config['DATABASE_ABS'],
+                backup_dir=app.config['BACKUP_DIR'],
                 settings=backup_settings
             )
             backup_manager.start_periodic_backup()
@@ -138,6 +209,18 @@ def start_backup_system(app):
             app._backup_manager = backup_manager
 
 
+def start_cache_warmup(app):
+    """Warm the database page cache in the background after startup."""
+    def warm():
+        with app.app_context():
+            try:
+                Database.warm_cache()
+            except Exception as e:
+                print(f"⚠️  Database warm-up skipped: {e}")
+    
+    threading.Thread(target=warm, daemon=True).start()
+
+
 def run_desktop_app(app):
     """Run the app in a desktop window using PyQt5"""
     import os
@@ -171,18 +254,22 @@ def run_desktop_app(app):
         webview = QWebEngineView()
         window.setCentralWidget(webview)
         
-        def start_flask():
-            app.run(debug=False, host='127.0.0.1', port=5000, use_reloader=False, threaded=True)
+        sock = bind_socket('127.0.0.1', 5000)
+        if sock is None:
+            raise RuntimeError("No available ports found")
+        port = sock.getsockname()[1]
+        url = f'http://127.0.0.1:{port}'
         
-        # Start Flask in a separate thread
-        flask_thread = threading.Thread(target=start_flask, daemon=True)
+        # Start the server in a separate thread
+        flask_thread = threading.Thread(target=serve_app, args=(app, sock), daemon=True)
         flask_thread.start()
         
         def load_app():
-            webview.load(QUrl('http://127.0.0.1:5000'))
+            wait_for_server(port)
+            webview.load(QUrl(url))
         
-        # Wait for Flask to start, then load the app
-        QTimer.singleShot(2000, load_app)  # 2 second delay
+        # Load the app as soon as the event loop is running
+        QTimer.singleShot(0, load_app)
         
         # Show window and start Qt event loop
         window.show()
@@ -248,12 +335,15 @@ def try_webview_fallback(app):
     try:
         import webview
         
-        def start_flask():
-            app.run(debug=False, host='127.0.0.1', port=5000, use_reloader=False)
+        sock = bind_socket('127.0.0.1', 5000)
+        if sock is None:
+            raise RuntimeError("No available ports found")
+        port = sock.getsockname()[1]
+        url = f'http://127.0.0.1:{port}'
         
-        flask_thread = threading.Thread(target=start_flask, daemon=True)
+        flask_thread = threading.Thread(target=serve_app, args=(app, sock), daemon=True)
         flask_thread.start()
-        time.sleep(2)
+        wait_for_server(port)
         
         def on_webview_close():
             """Handle webview window close"""
@@ -269,7 +359,7 @@ def try_webview_fallback(app):
         
         webview.create_window(
             title='💰 Money Tracker',
-            url='http://127.0.0.1:5000',
+            url=url,
             width=1400,
             height=900,
             min_size=(800, 600),
@@ -288,9 +378,60 @@ def try_webview_fallback(app):
         run_browser_app(app)
 
 
+def bind_socket(host, port, attempts=100):
+    """Bind a listening socket on the first free port from port onwards."""
+    import socket
+    
+    for candidate in range(port, port + attempts):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name != 'nt':
+            # On Windows SO_REUSEADDR would let us steal a port already in use
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, candidate))
+            sock.listen(128)
+            return sock
+        except OSError:
+            sock.close()
+    return None
+
+
+def wait_for_server(port, timeout=10.0):
+    """Poll until the local server accepts connections, up to timeout seconds."""
+    import socket
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.05).close()
+            return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def serve_app(app, sock, threads=8, connection_limit=256):
+    """Serve the app on an already bound and listening socket.
+    
+    Uses waitress when it is installed, falling back to Werkzeug's
+    threaded development server otherwise. connection_limit caps the open
+    connections waitress accepts (its default is 100), so a headless
+    instance shared by several browser tabs keeps keep-alive sockets open.
+    """
+    try:
+        from waitress import serve
+    except ImportError:
+        from werkzeug.serving import make_server
+        
+        host, port = sock.getsockname()[:2]
+        server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+        server.serve_forever()
+    else:
+        serve(app, sockets=[sock], threads=threads, connection_limit=connection_limit)
+
+
 def run_browser_app(app, host='0.0.0.0', port=5000):
     """Run the app and open in default browser"""
-    import socket
     import signal
     
     # Set up backup on shutdown for browser mode
@@ -313,31 +454,19 @@ def run_browser_app(app, host='0.0.0.0', port=5000):
     signal.signal(signal.SIGINT, backup_and_exit)
     signal.signal(signal.SIGTERM, backup_and_exit)
     
-    # Find an available port if the default is in use
-    def find_free_port(start_port):
-        for p in range(start_port, start_port + 100):
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('localhost', p))
-                    return p
-            except OSError:
-                continue
-        return None
-    
-    # Check if port is available
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(('localhost', port))
-    except OSError:
+    # Bind the listening socket up front and hand it to the server, so
+    # there is no window between probing a port and serving on it
+    sock = bind_socket(host, port)
+    if sock is None:
+        print("❌ No available ports found")
+        return
+    if sock.getsockname()[1] != port:
         print(f"⚠️  Port {port} is in use, finding available port...")
-        port = find_free_port(5000)
-        if port is None:
-            print("❌ No available ports found")
-            return
+        port = sock.getsockname()[1]
         print(f"✅ Using port {port}")
     
     def open_browser():
-        time.sleep(1.5)
+        wait_for_server(port)
         webbrowser.open(f'http://localhost:{port}')
         print(f"🌐 Money Tracker opened in browser at http://localhost:{port}")
     
@@ -347,55 +476,37 @@ def run_browser_app(app, host='0.0.0.0', port=5000):
     
     try:
         # Run Flask app
-        app.run(debug=False, host=host, port=port)
+        serve_app(app, sock)
     except KeyboardInterrupt:
         backup_and_exit(None, None)
 
 
-def run_headless(app, host='0.0.0.0', port=5000):
+def run_headless(app, host='0.0.0.0', port=5000, quiet=False):
     """Run the app in headless mode (no GUI)"""
-    print("\n" + "="*50)
-    print("💰 Money Tracker - Headless Mode")
-    print("="*50)
-    print(f"\n✅ Server running at: http://localhost:{port}")
-    print(f"🔗 API available at: http://localhost:{port}/api/")
-    print("\n📋 Available endpoints:")
-    print("  • GET  /api/accounts")
-    print("  • POST /api/accounts")
-    print("  • GET  /api/transactions")
-    print("  • POST /api/transactions")
-    print("  • GET  /api/recurring")
-    print("  • GET  /api/analytics/stats")
-    print("  • GET  /api/analytics/charts")
-    print("  • GET  /api/export")
-    print("\n💡 Access the web interface from any browser")
-    print("🛑 Press Ctrl+C to stop the server")
-    print("="*50 + "\n")
+    if not quiet:
+        sys.stdout.write(HEADLESS_BANNER.format(port=port))
+        sys.stdout.flush()
     
-    app.run(debug=False, host=host, port=port)
+    sock = bind_socket(host, port, attempts=1)
+    if sock is None:
+        print(f"❌ Port {port} is already in use")
+        return
+    
+    serve_app(app, sock)
 
 
-def print_startup_info():
+def print_startup_info(mode_message=''):
     """Print startup information"""
-    print("\n" + "="*50)
-    print("💰 Money Tracker Flask Server (Refactored)")
-    print("="*50)
-    print("\n📊 Features:")
-    print("  • Modular architecture")
-    print("  • Real SQLite database (money_tracker.db)")
-    print("  • Recurring transactions")
-    print("  • Multiple account support")
-    print("  • Analytics and charts")
-    print("  • Data export functionality")
-    print("  • Automatic database backups")
-    print("\n💡 Tips:")
-    print("  • Data persists between sessions")
-    print("  • Access from any device on your network")
-    print("  • Database file: money_tracker.db")
-    print("  • Backups stored in: backups/ directory")
+    sys.stdout.write(STARTUP_BANNER + mode_message)
+    sys.stdout.flush()
 
 
 if __name__ == '__main__':
+    # Emoji in the console output would otherwise fail to encode on legacy
+    # Windows code pages; windowed builds have no stdout at all
+    if sys.stdout is not None and hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Money Tracker - Personal Finance Manager')
     parser.add_argument('--mode', choices=['window', 'browser', 'headless'], 
@@ -405,6 +516,8 @@ if __name__ == '__main__':
                        help='Port to run the server on (default: 5000)')
     parser.add_argument('--host', default='0.0.0.0',
                        help='Host to bind to (default: 0.0.0.0)')
+    parser.add_argument('--quiet', action='store_true',
+                       help='Do not print the startup banner')
     
     args = parser.parse_args()
     
@@ -419,32 +532,32 @@ if __name__ == '__main__':
         print("Database initialized (empty)")
     else:
         print(f"Using existing database: {app.config['DATABASE']}")
-        # Run migrations for existing database
+        # Run any pending migrations for existing database
         with app.app_context():
-            Database.migrate_add_project_column()
-            Database.migrate_add_increment_column()
-            Database.migrate_add_projects_table()
-            Database.migrate_add_project_category_notes()
+            Database.migrate()
     
     # Start backup system
     start_backup_system(app)
     
+    # Pull the database into the page cache so the first request is fast
+    start_cache_warmup(app)
+    
     # Run based on selected mode
     if args.mode == 'window':
-        print_startup_info()
-        print("\n🖥️  Starting in Desktop Window mode...")
-        print("="*50 + "\n")
+        if not args.quiet:
+            print_startup_info(f"\n🖥️  Starting in Desktop Window mode...\n{RULE}\n\n")
         run_desktop_app(app)
         
     elif args.mode == 'browser':
-        print_startup_info()
-        print(f"\n🌐 Starting in Browser mode on http://localhost:{args.port}")
-        print("🚀 Opening browser automatically...")
-        print("="*50 + "\n")
+        if not args.quiet:
+            print_startup_info(
+                f"\n🌐 Starting in Browser mode on http://localhost:{args.port}\n"
+                f"🚀 Opening browser automatically...\n{RULE}\n\n"
+            )
         run_browser_app(app, args.host, args.port)
         
     elif args.mode == 'headless':
-        run_headless(app, args.host, args.port)
+        run_headless(app, args.host, args.port, quiet=args.quiet)
     
     else:
         print("❌ Invalid mode specified")
@@ -0,0 +1,54 @@
+"""Test case base that runs the real app against a throwaway database file."""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import main
+from app.database import Database
+from app.utils import cache
+
+
+class AppTestCase(unittest.TestCase):
+    """Create the app on a fresh database file for every test."""
+
+    def setUp(self):
+        """Build the app and schema in a temporary directory."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, 'test.db')
+
+        # create_app would otherwise read (and write) settings.json in the cwd
+        settings = {'database_path': self.db_path, 'backup': {'enabled': False}}
+        with patch('main.load_settings', return_value=settings):
+            self.app = main.create_app()
+        self.app.config['TESTING'] = True
+
+        with self.app.app_context():
+            Database.init_db()
+        self.addCleanup(Database.close_pool, self.db_path)
+
+        # Cached analytics from an earlier test's database must not leak in
+        cache.invalidate()
+        self.client = self.app.test_client()
+
+    def connect(self):
+        """Open a plain connection to the test database for assertions."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        self.addCleanup(conn.close)
+        return conn
+
+    def create_account(self, name, account_type='current', balance=0):
+        """Create an account through the API and return its id."""
+        response = self.client.post('/api/accounts', json={
+            'name': name, 'type': account_type, 'balance': balance
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['id']
+
+    def balances(self):
+        """Return {account_id: balance} as stored on the accounts table."""
+        rows = self.connect().execute('SELECT id, balance FROM accounts')
+        return {row['id']: row['balance'] for row in rows}
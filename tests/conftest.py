@@ -6,8 +6,8 @@ import tempfile
 import sqlite3
 from pathlib import Path
 
-# Add the project root to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Add the project root to Python path, once for every test module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
 @pytest.fixture
@@ -0,0 +1,35 @@
+"""Lightweight stand-ins for database connections in unit tests."""
+
+
+class FakeCursor:
+    """Record executed SQL and return canned results.
+
+    Serves both as the connection yielded by Database.get_db and as the
+    cursor its execute returns, which is all the model functions touch.
+    """
+
+    def __init__(self, rows=None, one=None, lastrowid=None, rowcount=0):
+        self._rows = rows
+        self._one = one
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=()):
+        self.calls.append((sql, params))
+        return self
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._one
+
+    def commit(self):
+        pass
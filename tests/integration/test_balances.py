@@ -0,0 +1,126 @@
+"""Integration tests for the triggers that keep account balances."""
+import unittest
+
+from app.database import Database
+from tests.app_case import AppTestCase
+
+
+class TestBalanceTriggers(AppTestCase):
+    """Test cases for balances maintained by the transaction triggers."""
+
+    def setUp(self):
+        """Create two empty accounts, so each balance is just its transactions."""
+        super().setUp()
+        self.current = self.create_account('Current')
+        self.savings = self.create_account('Savings', 'savings')
+
+    def add(self, account_id, amount, trans_type='expense', **extra):
+        """Add a transaction through the API and return the new row's id."""
+        response = self.client.post('/api/transactions', json=dict(
+            account_id=account_id, amount=amount, date='2024-01-05', type=trans_type, **extra
+        ))
+        self.assertEqual(response.status_code, 200)
+        return self.connect().execute('SELECT MAX(id) FROM transactions').fetchone()[0]
+
+    def update(self, transaction_id, account_id, amount, trans_type='expense', **extra):
+        """Re-post a transaction through the API."""
+        response = self.client.put(f'/api/transactions/{transaction_id}', json=dict(
+            account_id=account_id, amount=amount, date='2024-01-05', type=trans_type, **extra
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def assertBalancesMatchTransactions(self):
+        """Assert each stored balance equals the sum of its account's transactions."""
+        sums = dict(self.connect().execute('''
+            SELECT a.id, COALESCE(SUM(t.amount), 0)
+            FROM accounts a LEFT JOIN transactions t ON t.account_id = a.id
+            GROUP BY a.id
+        ''').fetchall())
+        self.assertEqual(self.balances(), sums)
+
+    def test_create(self):
+        """Test inserting expenses and income posts their signed amounts."""
+        self.add(self.current, 25)
+        self.add(self.current, 100, 'income')
+
+        self.assertEqual(self.balances()[self.current], 75)
+        self.assertBalancesMatchTransactions()
+
+    def test_update_amount(self):
+        """Test changing an amount posts only the difference."""
+        transaction_id = self.add(self.current, 25)
+        self.update(transaction_id, self.current, 40)
+
+        self.assertEqual(self.balances()[self.current], -40)
+        self.assertBalancesMatchTransactions()
+
+    def test_move_to_other_account(self):
+        """Test moving a transaction takes it off one balance and onto the other."""
+        transaction_id = self.add(self.current, 25)
+        self.update(transaction_id, self.savings, 30)
+
+        self.assertEqual(self.balances(), {self.current: 0, self.savings: -30})
+        self.assertBalancesMatchTransactions()
+
+    def test_delete(self):
+        """Test deleting a transaction reverses it."""
+        self.add(self.current, 10)
+        remove = self.add(self.current, 25)
+
+        response = self.client.delete(f'/api/transactions/{remove}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balances()[self.current], -10)
+        self.assertBalancesMatchTransactions()
+
+    def test_transfer_pair(self):
+        """Test a transfer debits the source and credits the destination."""
+        self.add(self.current, 50, 'transfer', transfer_account_id=self.savings)
+
+        self.assertEqual(self.balances(), {self.current: -50, self.savings: 50})
+        self.assertBalancesMatchTransactions()
+
+        # Re-posting the debit leg with a new amount keeps it a debit
+        debit_id = self.connect().execute(
+            'SELECT id FROM transactions WHERE account_id = ?', (self.current,)
+        ).fetchone()[0]
+        self.update(debit_id, self.current, 70, 'transfer', transfer_account_id=self.savings)
+
+        self.assertEqual(self.balances()[self.current], -70)
+        self.assertBalancesMatchTransactions()
+
+    def test_bulk_insert_posts_each_delta_once(self):
+        """Test a batch posts each account's net once and leaves the trigger on."""
+        response = self.client.post('/api/transactions/bulk', json={'rows': [
+            {'account_id': self.current, 'amount': 10, 'date': '2024-01-05', 'type': 'expense'},
+            {'account_id': self.current, 'amount': 5, 'date': '2024-01-06', 'type': 'expense'},
+            {'account_id': self.savings, 'amount': 40, 'date': '2024-01-06', 'type': 'income'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.balances(), {self.current: -15, self.savings: 40})
+        self.assertBalancesMatchTransactions()
+        self.assertEqual(self.connect().execute('SELECT COUNT(*) FROM balance_batch').fetchone()[0], 0)
+
+        # The per-row insert trigger fires again once the batch is done
+        self.add(self.current, 1)
+
+        self.assertEqual(self.balances()[self.current], -16)
+        self.assertBalancesMatchTransactions()
+
+    def test_migrate_clears_leftover_batch_flag(self):
+        """Test a committed balance_batch row doesn't keep the insert trigger off."""
+        conn = self.connect()
+        conn.execute('INSERT INTO balance_batch (active) VALUES (1)')
+        conn.commit()
+
+        with self.app.app_context():
+            Database.migrate()
+        self.add(self.current, 25)
+
+        self.assertEqual(self.balances()[self.current], -25)
+        self.assertBalancesMatchTransactions()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+"""Integration tests for the data routes."""
+import os
+import unittest
+
+from tests.app_case import AppTestCase
+
+
+class TestDatabaseInfo(AppTestCase):
+    """Test cases for GET /api/database/info."""
+
+    def test_size_excludes_wal_file(self):
+        """Test the size is the database's pages, not the pages plus the -wal file."""
+        account_id = self.create_account('Current')
+        self.client.post('/api/transactions/bulk', json={'rows': [
+            {'account_id': account_id, 'amount': 1, 'date': '2024-01-05', 'type': 'expense'}
+        ] * 500})
+        self.assertGreater(os.path.getsize(self.db_path + '-wal'), 0)
+
+        response = self.client.get('/api/database/info')
+
+        conn = self.connect()
+        size = (conn.execute('PRAGMA page_count').fetchone()[0]
+                * conn.execute('PRAGMA page_size').fetchone()[0])
+        self.assertEqual(response.get_json()['size'], f"{size / 1024:.2f} KB")
+
+
+if __name__ == '__main__':
+    unittest.main()
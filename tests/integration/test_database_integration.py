@@ -1,12 +1,6 @@
 """Integration tests for database operations."""
 import unittest
-import os
-import sys
 import sqlite3
-import tempfile
-
-# Add the parent directory to the path to import app modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.database import Database
 
@@ -14,15 +8,11 @@ from app.database import Database
 class TestDatabaseIntegration(unittest.TestCase):
     """Integration tests for database operations."""
 
-    def setUp(self):
-        """Set up test database."""
-        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
-        self.temp_db_path = self.temp_db.name
-        self.temp_db.close()
-        
-        # Initialize test database directly with SQLite
-        conn = sqlite3.connect(self.temp_db_path)
-        conn.executescript('''
+    @classmethod
+    def setUpClass(cls):
+        """Build the schema once in memory; each test works on its own copy."""
+        cls._template = sqlite3.connect(':memory:')
+        cls._template.executescript('''
             CREATE TABLE IF NOT EXISTS accounts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
@@ -45,19 +35,36 @@ class TestDatabaseIntegration(unittest.TestCase):
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (account_id) REFERENCES accounts (id)
             );
+
+            -- Same shapes as Database.INDEXES, so query plans match production
+            CREATE INDEX IF NOT EXISTS idx_tx_acct_date ON transactions (account_id, date DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions (date DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_tx_cat_date ON transactions (category, date DESC, id DESC) WHERE category IS NOT NULL;
         ''')
-        conn.commit()
-        conn.close()
+        cls._template.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the template database."""
+        cls._template.close()
+
+    def setUp(self):
+        """Set up test database.
+        
+        None of these tests depend on durability, so each runs against an
+        in-memory copy of the prepared schema rather than a file on disk.
+        """
+        self.conn = sqlite3.connect(':memory:')
+        self._template.backup(self.conn)
 
     def tearDown(self):
         """Clean up test database."""
-        if os.path.exists(self.temp_db_path):
-            os.unlink(self.temp_db_path)
+        self.conn.close()
 
     def test_database_connection(self):
         """Test database connection and basic operations."""
         # Test basic database connection
-        conn = sqlite3.connect(self.temp_db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Test creating a simple table
@@ -78,25 +85,19 @@ class TestDatabaseIntegration(unittest.TestCase):
         
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0][1], 'test')
-        
-        conn.close()
 
     def test_database_schema_creation(self):
         """Test that database schema is created correctly."""
-        conn = sqlite3.connect(self.temp_db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Create expected tables
         expected_tables = ['accounts', 'transactions']
         
-        for table in expected_tables:
-            cursor.execute(f'''
-                CREATE TABLE IF NOT EXISTS {table} (
-                    id INTEGER PRIMARY KEY
-                )
-            ''')
-        
-        conn.commit()
+        cursor.executescript(''.join(
+            f'CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY);'
+            for table in expected_tables
+        ))
         
         # Verify tables exist
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -104,12 +105,10 @@ class TestDatabaseIntegration(unittest.TestCase):
         
         for table in expected_tables:
             self.assertIn(table, tables)
-        
-        conn.close()
 
     def test_transaction_integrity(self):
         """Test database transaction integrity."""
-        conn = sqlite3.connect(self.temp_db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Create test table
@@ -123,8 +122,7 @@ class TestDatabaseIntegration(unittest.TestCase):
         try:
             # Start transaction
             cursor.execute('BEGIN')
-            cursor.execute('INSERT INTO integrity_test (value) VALUES (?)', (1,))
-            cursor.execute('INSERT INTO integrity_test (value) VALUES (?)', (2,))
+            cursor.executemany('INSERT INTO integrity_test (value) VALUES (?)', [(1,), (2,)])
             
             # Verify data is inserted but not committed
             cursor.execute('SELECT COUNT(*) FROM integrity_test')
@@ -143,12 +141,10 @@ class TestDatabaseIntegration(unittest.TestCase):
         cursor.execute('SELECT COUNT(*) FROM integrity_test')
         count = cursor.fetchone()[0]
         self.assertEqual(count, 2)
-        
-        conn.close()
 
     def test_database_constraints(self):
         """Test database constraints and foreign keys."""
-        conn = sqlite3.connect(self.temp_db_path)
+        conn = self.conn
         cursor = conn.cursor()
         
         # Enable foreign keys
@@ -191,8 +187,6 @@ class TestDatabaseIntegration(unittest.TestCase):
         
         self.assertEqual(result[0], 'parent')
         self.assertEqual(result[1], 'child')
-        
-        conn.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,105 @@
+"""Integration tests for pooled database connections."""
+import os
+import threading
+import time
+import unittest
+
+from app.database import Database
+from app.utils.backup import copy_database
+from tests.app_case import AppTestCase
+
+
+class TestPooledConnections(AppTestCase):
+    """Test cases for connections handed out by Database.get_db."""
+
+    def checkout(self, method=None):
+        """Check a connection out and back in; return it and its foreign_keys setting.
+
+        A method runs the checkout inside a request with that method, which
+        decides between the read-write and read-only pools.
+        """
+        if method is None:
+            context = self.app.app_context()
+        else:
+            context = self.app.test_request_context(method=method)
+        with context:
+            with Database.get_db() as db:
+                enabled = db.execute('PRAGMA foreign_keys').fetchone()[0]
+        return db, enabled
+
+    def test_foreign_keys_enforced_on_pooled_connections(self):
+        """Test foreign keys are on for new and reused, read-write and read-only connections."""
+        for method in (None, 'GET'):
+            with self.subTest(method=method):
+                first, first_enabled = self.checkout(method)
+                again, again_enabled = self.checkout(method)
+
+                # The second checkout is the pooled connection, not a new one
+                self.assertIs(again, first)
+                self.assertEqual(first_enabled, 1)
+                self.assertEqual(again_enabled, 1)
+
+    def test_read_only_connection_is_separate(self):
+        """Test GET requests are served from the read-only pool."""
+        writer, _ = self.checkout()
+        reader, _ = self.checkout('GET')
+
+        self.assertIsNot(reader, writer)
+
+    def test_replacing_waits_for_checked_out_connections(self):
+        """Test a swap waits for an in-flight write, and later checkouts wait for the swap."""
+        self.create_account('Before')
+        snapshot = os.path.join(os.path.dirname(self.db_path), 'snapshot.db')
+        copy_database(self.db_path, snapshot)
+
+        events = []
+        checked_out, finish_write = threading.Event(), threading.Event()
+
+        def write():
+            with self.app.app_context():
+                with Database.get_db() as db:
+                    checked_out.set()
+                    finish_write.wait(5)
+                    db.execute("INSERT INTO accounts (name, type) VALUES ('During', 'current')")
+                    db.commit()
+                    events.append('write')
+
+        def late_checkout():
+            with self.app.app_context():
+                with Database.get_db():
+                    events.append('late checkout')
+
+        def swap():
+            with self.app.app_context():
+                with Database.replacing():
+                    events.append('swap')
+                    late = threading.Thread(target=late_checkout)
+                    late.start()
+                    # Give the late checkout time to reach get_db
+                    late.join(0.2)
+                    copy_database(snapshot, self.db_path)
+                    events.append('swapped')
+            late.join(5)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        checked_out.wait(5)
+        swapper = threading.Thread(target=swap)
+        swapper.start()
+
+        # The swap doesn't start while the writer still holds its connection
+        swapper.join(0.2)
+        self.assertTrue(swapper.is_alive())
+        self.assertEqual(events, [])
+
+        finish_write.set()
+        writer.join(5)
+        swapper.join(5)
+
+        self.assertEqual(events, ['write', 'swap', 'swapped', 'late checkout'])
+        names = [row[0] for row in self.connect().execute('SELECT name FROM accounts')]
+        self.assertEqual(names, ['Before'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Integration tests for processing recurring transactions."""
+import contextlib
+import io
+import unittest
+from datetime import date, timedelta
+
+from tests.app_case import AppTestCase
+
+
+class TestProcessDue(AppTestCase):
+    """Test cases for POST /api/recurring/process."""
+
+    def setUp(self):
+        """Create a current and a savings account."""
+        super().setUp()
+        self.current = self.create_account('Current')
+        self.savings = self.create_account('Savings', 'savings')
+        self.today = date.today()
+
+    def days_ago(self, days):
+        """Return the ISO date the given number of days before today."""
+        return (self.today - timedelta(days=days)).isoformat()
+
+    def add_recurring(self, start, **fields):
+        """Create a weekly recurring expense (and its first transaction) from start."""
+        data = {'account_id': self.current, 'amount': 10, 'date': start, 'type': 'expense',
+                'payee': 'Gym', 'is_recurring': True, 'frequency': 'weekly'}
+        data.update(fields)
+        response = self.client.post('/api/transactions', json=data)
+        self.assertEqual(response.status_code, 200)
+
+    def process(self):
+        """Process due items and return how many occurrences were posted."""
+        response = self.client.post('/api/recurring/process')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['processed']
+
+    def posted(self):
+        """Return the (account_id, amount, date, payee) of every recurring posting."""
+        return [tuple(row) for row in self.connect().execute('''
+            SELECT account_id, amount, date, payee FROM transactions
+            WHERE recurring_id IS NOT NULL ORDER BY date, id
+        ''')]
+
+    def test_catches_up_missed_periods(self):
+        """Test every missed occurrence up to today is posted once."""
+        self.add_recurring(self.days_ago(21))
+
+        self.assertEqual(self.process(), 3)
+        self.assertEqual([row[2] for row in self.posted()],
+                         [self.days_ago(21), self.days_ago(14), self.days_ago(7), self.days_ago(0)])
+        self.assertEqual(self.balances()[self.current], -40)
+
+        # Nothing is due again until next week
+        self.assertEqual(self.process(), 0)
+        last = self.connect().execute('SELECT last_processed FROM recurring_transactions').fetchone()[0]
+        self.assertEqual(last, self.days_ago(0))
+
+    def test_increment_grows_each_occurrence(self):
+        """Test each occurrence adds the increment and the schedule keeps the last amount."""
+        self.add_recurring(self.days_ago(14), increment_amount=5)
+
+        self.assertEqual(self.process(), 2)
+        self.assertEqual([row[1] for row in self.posted()], [-10, -15, -20])
+        amount = self.connect().execute('SELECT amount FROM recurring_transactions').fetchone()[0]
+        self.assertEqual(amount, 20)
+
+    def test_transfer_posts_both_legs(self):
+        """Test a recurring transfer debits the source and credits the named account."""
+        self.add_recurring(self.days_ago(7), type='transfer', payee='Savings',
+                           transfer_account_id=self.savings)
+
+        self.assertEqual(self.process(), 1)
+        due = [row for row in self.posted() if row[2] == self.days_ago(0)]
+        self.assertEqual(due, [(self.current, -10, self.days_ago(0), 'Savings'),
+                               (self.savings, 10, self.days_ago(0), 'Current')])
+        self.assertEqual(self.balances(), {self.current: -20, self.savings: 20})
+
+    def test_transfer_without_destination_posts_debit_only(self):
+        """Test a transfer to an unknown account posts just the debit, with a warning."""
+        self.add_recurring(self.days_ago(7), type='transfer', payee='Nowhere',
+                           transfer_account_id=self.savings)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(self.process(), 1)
+
+        self.assertIn("'Nowhere' not found", output.getvalue())
+        due = [row for row in self.posted() if row[2] == self.days_ago(0)]
+        self.assertEqual(due, [(self.current, -10, self.days_ago(0), 'Nowhere')])
+
+    def test_inactive_schedule_is_skipped(self):
+        """Test a deleted (deactivated) schedule posts nothing."""
+        self.add_recurring(self.days_ago(21))
+        self.client.delete('/api/recurring/1')
+
+        self.assertEqual(self.process(), 0)
+        self.assertEqual(len(self.posted()), 1)
+
+    def test_monthly_clamps_to_month_end(self):
+        """Test a schedule on the 31st runs on the last day of shorter months."""
+        self.add_recurring('2023-01-31', frequency='monthly')
+
+        self.process()
+
+        dates = [row[2] for row in self.posted()][:6]
+        self.assertEqual(dates, ['2023-01-31', '2023-02-28', '2023-03-31',
+                                 '2023-04-30', '2023-05-31', '2023-06-30'])
+
+
+if __name__ == '__main__':
+    unittest.main()
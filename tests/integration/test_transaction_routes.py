@@ -0,0 +1,206 @@
+"""Integration tests for the transaction routes."""
+import unittest
+from urllib.parse import parse_qsl
+
+from tests.app_case import AppTestCase
+
+
+class TestBulkCreate(AppTestCase):
+    """Test cases for POST /api/transactions/bulk."""
+
+    def setUp(self):
+        """Create two accounts to post rows against."""
+        super().setUp()
+        self.current = self.create_account('Current', balance=100)
+        self.savings = self.create_account('Savings', 'savings')
+
+    def post_rows(self, rows):
+        """Post rows to the bulk endpoint."""
+        return self.client.post('/api/transactions/bulk', json={'rows': rows})
+
+    def row(self, **overrides):
+        """Return a valid expense row with the given fields replaced."""
+        row = {'account_id': self.current, 'amount': 10, 'date': '2024-01-05',
+               'type': 'expense', 'payee': 'Shop', 'category': 'Food'}
+        row.update(overrides)
+        return row
+
+    def test_bulk_create_posts_balances(self):
+        """Test rows are inserted and each account's balance moves by its net."""
+        response = self.post_rows([
+            self.row(),
+            self.row(amount='2.5'),
+            self.row(account_id=self.savings, amount=40, type='income'),
+            self.row(amount=-30, type='income', date='2024-01-06'),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['added'], 4)
+
+        balances = self.balances()
+        self.assertEqual(balances[self.current], 100 - 10 - 2.5 + 30)
+        self.assertEqual(balances[self.savings], 40)
+
+        amounts = [row['amount'] for row in self.connect().execute(
+            'SELECT amount FROM transactions ORDER BY id'
+        )]
+        self.assertEqual(amounts, [-10, -2.5, 40, 30])
+
+    def test_bulk_create_empty_rows(self):
+        """Test an empty list adds nothing and succeeds."""
+        response = self.post_rows([])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['added'], 0)
+
+    def test_bulk_create_rejects_bad_rows(self):
+        """Test every malformed row is a 400 naming it, and nothing is written."""
+        cases = {
+            'expected a JSON object': 'not a row',
+            'missing required fields: date': self.row(date=''),
+            'type must be income or expense': self.row(type='transfer'),
+            'amount must be a number': self.row(amount='ten'),
+            'account_id must be an integer': self.row(account_id='1x'),
+            'date must be YYYY-MM-DD': self.row(date='05/01/2024'),
+            'unknown account 999': self.row(account_id=999),
+        }
+        for message, bad_row in cases.items():
+            with self.subTest(message):
+                response = self.post_rows([self.row(), bad_row])
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()['error'], f'Row 1: {message}')
+
+        count = self.connect().execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+        self.assertEqual(count, 0)
+        self.assertEqual(self.balances()[self.current], 100)
+
+    def test_bulk_create_rejects_bad_body(self):
+        """Test a body without a list of rows is a 400."""
+        for body in ([], {'rows': 'x'}, {}):
+            with self.subTest(body=body):
+                response = self.client.post('/api/transactions/bulk', json=body)
+                self.assertEqual(response.status_code, 400)
+
+
+class TestUnknownAccounts(AppTestCase):
+    """Test cases for writes that reference accounts that don't exist."""
+
+    def setUp(self):
+        """Create one real account."""
+        super().setUp()
+        self.current = self.create_account('Current')
+
+    def test_writes_to_unknown_accounts_are_rejected(self):
+        """Test transaction, transfer and recurring writes to a missing account are 400s."""
+        base = {'account_id': self.current, 'amount': 10, 'date': '2024-01-05', 'type': 'expense'}
+        cases = {
+            'transaction': dict(base, account_id=999),
+            'transfer': dict(base, type='transfer', transfer_account_id=999),
+            'recurring': dict(base, account_id=999, is_recurring=True, frequency='monthly'),
+        }
+        for name, data in cases.items():
+            with self.subTest(name):
+                response = self.client.post('/api/transactions', json=data)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()['error'], 'Unknown account')
+
+        conn = self.connect()
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0], 0)
+        self.assertEqual(self.balances()[self.current], 0)
+
+    def test_non_integer_account_ids_are_rejected(self):
+        """Test a non-numeric account or transfer destination is a 400, and nothing is written."""
+        base = {'account_id': self.current, 'amount': 10, 'date': '2024-01-05', 'type': 'expense'}
+        cases = {
+            'account_id': dict(base, account_id='Current'),
+            'transfer_account_id': dict(base, type='transfer', transfer_account_id='Savings'),
+        }
+        for field, data in cases.items():
+            with self.subTest(field):
+                response = self.client.post('/api/transactions', json=data)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json()['error'], f'{field} must be an integer')
+
+        self.assertEqual(self.connect().execute('SELECT COUNT(*) FROM transactions').fetchone()[0], 0)
+
+    def test_update_to_unknown_account_is_rejected(self):
+        """Test moving a transaction to a missing account is a 400 and changes nothing."""
+        self.client.post('/api/transactions', json={
+            'account_id': self.current, 'amount': 10, 'date': '2024-01-05', 'type': 'expense'
+        })
+
+        response = self.client.put('/api/transactions/1', json={
+            'account_id': 999, 'amount': 10, 'date': '2024-01-05', 'type': 'expense'
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.balances()[self.current], -10)
+
+
+class TestPaging(AppTestCase):
+    """Test cases for paging through GET /api/transactions."""
+
+    def setUp(self):
+        """Create an account with seven transactions, several sharing a date."""
+        super().setUp()
+        self.current = self.create_account('Current')
+        for day in ['2024-01-03', '2024-01-05', '2024-01-05', '2024-01-05',
+                    '2024-01-04', '2024-01-05', '2024-01-01']:
+            self.client.post('/api/transactions', json={
+                'account_id': self.current, 'amount': 1, 'date': day, 'type': 'expense'
+            })
+
+    def test_pages_cover_every_row_once(self):
+        """Test following X-Next-Cursor returns each row once, in list order."""
+        expected = [row['id'] for row in self.connect().execute(
+            'SELECT id FROM transactions ORDER BY date DESC, id DESC'
+        )]
+
+        seen, pages = [], 0
+        params = {'limit': 3}
+        while True:
+            response = self.client.get('/api/transactions', query_string=params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.get_json())
+            pages += 1
+            if 'X-Next-Cursor' not in response.headers:
+                break
+            params = dict(parse_qsl(response.headers['X-Next-Cursor']), limit=3)
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_filters_by_account(self):
+        """Test account_id limits the list to that account's rows."""
+        other = self.create_account('Other')
+        self.client.post('/api/transactions', json={
+            'account_id': other, 'amount': 1, 'date': '2024-01-02', 'type': 'expense'
+        })
+
+        response = self.client.get('/api/transactions', query_string={'account_id': other})
+
+        self.assertEqual([row['account_id'] for row in response.get_json()], [other])
+
+    def test_rejects_bad_paging_arguments(self):
+        """Test a malformed cursor, limit or account_id is a 400, not silently ignored."""
+        cases = [
+            {'cursor_date': '2024-01-05', 'cursor_id': 'abc'},
+            {'cursor_date': '2024-01-05'},
+            {'cursor_id': '4'},
+            {'limit': '0'},
+            {'limit': '-1'},
+            {'limit': 'ten'},
+            {'account_id': 'current'},
+        ]
+        for params in cases:
+            with self.subTest(**params):
+                response = self.client.get('/api/transactions', query_string=params)
+
+                self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
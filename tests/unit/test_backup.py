@@ -3,12 +3,7 @@ import unittest
 from unittest.mock import patch, MagicMock, mock_open
 import os
 import tempfile
-import sys
 from pathlib import Path
-from datetime import datetime, timedelta
-
-# Add the parent directory to the path to import app modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.utils.backup import BackupManager
 
@@ -16,25 +11,33 @@ from app.utils.backup import BackupManager
 class TestBackupManager(unittest.TestCase):
     """Test cases for BackupManager class."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.db_path = os.path.join(self.temp_dir, 'test.db')
-        self.backup_dir = os.path.join(self.temp_dir, 'backups')
+    @classmethod
+    def setUpClass(cls):
+        """Create the source database once; tests only read from it."""
+        import sqlite3
+        cls._src_tmp = tempfile.TemporaryDirectory()
+        cls.src_db_path = os.path.join(cls._src_tmp.name, 'test.db')
         
         # Create a real SQLite database file for testing
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(cls.src_db_path)
         conn.execute('CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT)')
         conn.execute('INSERT INTO test (name) VALUES (?)', ('test_data',))
         conn.commit()
         conn.close()
 
-    def tearDown(self):
-        """Clean up test fixtures."""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the source database."""
+        cls._src_tmp.cleanup()
+
+    def setUp(self):
+        """Set up test fixtures."""
+        # Cleanups run even when setUp or the test fails part way through
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.temp_dir = tmp.name
+        self.db_path = self.src_db_path
+        self.backup_dir = os.path.join(self.temp_dir, 'backups')
 
     def test_backup_manager_init_default_settings(self):
         """Test BackupManager initialization with default settings."""
@@ -69,40 +72,60 @@ class TestBackupManager(unittest.TestCase):
         self.assertTrue(os.path.exists(self.backup_dir))
         self.assertTrue(os.path.isdir(self.backup_dir))
 
+    @unittest.skipUnless(hasattr(BackupManager, 'create_backup'), 'BackupManager.create_backup not implemented')
     def test_create_backup(self):
         """Test backup creation method."""
         manager = BackupManager(self.db_path, self.backup_dir)
         
         # Test actual backup creation
-        if hasattr(manager, 'create_backup'):
-            result = manager.create_backup()
-            
-            # Verify backup was created
-            self.assertIsNotNone(result)
-            self.assertTrue(os.path.exists(result))
-            
-            # Verify it's a valid SQLite database
-            import sqlite3
-            conn = sqlite3.connect(result)
-            cursor = conn.execute('SELECT name FROM test')
-            row = cursor.fetchone()
-            self.assertEqual(row[0], 'test_data')
-            conn.close()
+        result = manager.create_backup()
+        
+        # Verify backup was created
+        self.assertIsNotNone(result)
+        self.assertTrue(os.path.exists(result))
+        
+        # Verify it's a valid SQLite database that opens read-only
+        import sqlite3
+        conn = sqlite3.connect(Path(result).resolve().as_uri() + '?mode=ro', uri=True)
+        self.assertEqual(conn.execute('PRAGMA quick_check').fetchone()[0], 'ok')
+        cursor = conn.execute('SELECT name FROM test')
+        row = cursor.fetchone()
+        self.assertEqual(row[0], 'test_data')
+        conn.close()
+
+    def test_restore_backup_into_open_database(self):
+        """Test restoring rewrites a live WAL database that still has connections open."""
+        import sqlite3
+        from app.utils.backup import copy_database
+
+        live_path = os.path.join(self.temp_dir, 'live.db')
+        live = sqlite3.connect(live_path)
+        self.addCleanup(live.close)
+        live.execute('PRAGMA journal_mode = WAL')
+        live.execute('CREATE TABLE other (id INTEGER PRIMARY KEY)')
+        live.commit()
+
+        manager = BackupManager(live_path, self.backup_dir)
+        copy_database(self.src_db_path, os.path.join(self.backup_dir, 'restore_me.db'))
 
+        manager.restore_backup('restore_me.db')
+
+        # The connection opened before the restore reads the restored contents
+        self.assertEqual(live.execute('SELECT name FROM test').fetchone()[0], 'test_data')
+        self.assertEqual(live.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(live.execute('PRAGMA quick_check').fetchone()[0], 'ok')
+
+    @unittest.skipUnless(hasattr(BackupManager, 'generate_backup_filename'), 'BackupManager.generate_backup_filename not implemented')
     def test_backup_filename_format(self):
         """Test backup filename follows expected format."""
         manager = BackupManager(self.db_path, self.backup_dir)
-        
-        # Test that backup filename would include timestamp
-        now = datetime.now()
-        expected_date = now.strftime('%Y%m%d_%H%M%S')
-        
+
         # This test assumes the backup filename includes timestamp
         # Actual implementation may vary
-        if hasattr(manager, 'generate_backup_filename'):
-            filename = manager.generate_backup_filename()
-            self.assertIn('backup', filename.lower())
+        filename = manager.generate_backup_filename()
+        self.assertIn('backup', filename.lower())
 
+    @unittest.skipUnless(hasattr(BackupManager, 'validate_backup'), 'BackupManager.validate_backup not implemented')
     @patch('os.path.exists')
     @patch('os.path.getsize')
     def test_backup_validation(self, mock_getsize, mock_exists):
@@ -112,10 +135,9 @@ class TestBackupManager(unittest.TestCase):
         
         manager = BackupManager(self.db_path, self.backup_dir)
         
-        # Test validation logic if implemented
-        if hasattr(manager, 'validate_backup'):
-            result = manager.validate_backup('fake_backup.db')
-            self.assertTrue(result)
+        # Test validation logic
+        result = manager.validate_backup('fake_backup.db')
+        self.assertTrue(result)
 
     def test_settings_update(self):
         """Test settings can be updated after initialization."""
@@ -130,6 +152,7 @@ class TestBackupManager(unittest.TestCase):
         self.assertTrue(manager.settings['enabled'])
         self.assertEqual(manager.settings['interval_hours'], 24)
 
+    @unittest.skipUnless(hasattr(BackupManager, 'cleanup_old_backups'), 'BackupManager.cleanup_old_backups not implemented')
     @patch('os.listdir')
     def test_cleanup_old_backups(self, mock_listdir):
         """Test cleanup of old backup files."""
@@ -143,10 +166,9 @@ class TestBackupManager(unittest.TestCase):
         
         manager = BackupManager(self.db_path, self.backup_dir, {'max_backups': 2})
         
-        # Test cleanup logic if implemented
-        if hasattr(manager, 'cleanup_old_backups'):
-            manager.cleanup_old_backups()
-            # Should keep only 2 most recent files
+        # Test cleanup logic
+        manager.cleanup_old_backups()
+        # Should keep only 2 most recent files
 
     def test_backup_manager_repr(self):
         """Test string representation of BackupManager."""
@@ -164,13 +186,18 @@ class TestBackupUtilityFunctions(unittest.TestCase):
         """Test backup path utilities."""
         from app.utils.backup import BackupManager
         
+        # Keep the backup directory the manager creates out of the working tree
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        backup_dir = os.path.join(tmp.name, 'backups')
+        
         # Test path validation
         invalid_paths = ['', None, '/nonexistent/path/db.db']
         for path in invalid_paths:
             if path is not None:
                 # Test that invalid paths are handled gracefully
                 try:
-                    manager = BackupManager(path, 'backups')
+                    manager = BackupManager(path, backup_dir)
                     self.assertIsInstance(manager.db_path, str)
                 except Exception as e:
                     # Should handle invalid paths gracefully
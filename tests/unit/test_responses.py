@@ -0,0 +1,54 @@
+"""Unit tests for JSON response helpers."""
+import unittest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils import responses
+
+
+@unittest.skipIf(responses.orjson is None, 'orjson not installed')
+class TestOrjsonProvider(unittest.TestCase):
+    """Test cases for OrjsonProvider."""
+
+    def setUp(self):
+        """Create an app using the orjson provider, and Flask's own provider to compare."""
+        self.app = Flask(__name__)
+        responses.init_app(self.app)
+        self.flask_json = DefaultJSONProvider(self.app)
+        self.payload = {
+            'zeta': 1,
+            'alpha': {'when': date(2024, 1, 5), 'amount': Decimal('12.50')},
+            'at': datetime(2024, 1, 5, 9, 30, tzinfo=timezone.utc),
+        }
+
+    def test_dumps_matches_flask(self):
+        """Test keys are sorted and dates become HTTP dates, as with Flask's provider."""
+        dumped = self.app.json.dumps(self.payload)
+
+        # Only the whitespace differs: orjson output is always compact
+        self.assertEqual(dumped, self.flask_json.dumps(self.payload, separators=(',', ':')))
+        self.assertIn('"Fri, 05 Jan 2024 00:00:00 GMT"', dumped)
+
+    def test_dumps_honours_sort_keys_and_default(self):
+        """Test the sort_keys and default arguments are applied."""
+        unsorted = self.app.json.dumps({'b': 1, 'a': 2}, sort_keys=False)
+        self.assertEqual(unsorted, '{"b":1,"a":2}')
+
+        dumped = self.app.json.dumps({'when': date(2024, 1, 5)}, default=date.isoformat)
+        self.assertEqual(dumped, '{"when":"2024-01-05"}')
+
+    def test_jsonify_response(self):
+        """Test jsonify encodes through the provider with the JSON mimetype."""
+        with self.app.app_context():
+            response = self.app.json.response(self.payload)
+
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(self.app.json.loads(response.get_data()),
+                         self.flask_json.loads(self.flask_json.dumps(self.payload)))
+
+
+if __name__ == '__main__':
+    unittest.main()